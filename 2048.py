@@ -1,19 +1,22 @@
-import pygame, random, time, math
+import pygame, time, math, sys, os
+from collections import OrderedDict
+import bitboard2048, gridboard2048, ai2048, history2048, textcache
 
-pygame.init()
 WIDTH, HEIGHT = 500, 620
 GRID_SIZE = 4
 TILE_SIZE = 100
 GAP = 15
+BOARD_X = 12  # left edge of the board, centred: (WIDTH - board span)//2
 TOP_OFFSET = 120
 FPS = 60
+HISTORY_FILE = "2048_history.bin"
 
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("2048")
-
-FONT = pygame.font.SysFont("arial", 32, bold=True)
-FONT_BIG = pygame.font.SysFont("arial", 56, bold=True)
-CLOCK = pygame.time.Clock()
+# the window, fonts and layers are made by open_window() from main(): the
+# solver's pool workers re-import this file when processes are spawned
+# (Windows, macOS) and must not open windows of their own
+WIN = None
+FONT = FONT_BIG = TILE_FONT = CLOCK = None
+BOARD_LAYER = GAME_OVER_LAYER = None
 
 COLORS = {
     0: (205,193,180), 2: (238,228,218), 4: (237,224,200), 8: (242,177,121),
@@ -21,60 +24,159 @@ COLORS = {
     256: (237,204,97), 512: (237,200,80), 1024: (237,197,63), 2048: (237,194,46)
 }
 
+# finished tile sprites keyed by (value, scale step); animation scales are
+# snapped to 1/SCALE_STEPS so a spawn or merge pop reuses a handful of sprites
+SCALE_STEPS = 20
+TILE_CACHE_SIZE = 256
+TILE_CACHE = OrderedDict()
+
+def tile_sprite(value, scale):
+    key = (value, round(scale*SCALE_STEPS))
+    sprite = TILE_CACHE.get(key)
+    if sprite is not None:
+        TILE_CACHE.move_to_end(key)
+        return sprite
+    size = TILE_SIZE*key[1]/SCALE_STEPS
+    text = TILE_FONT.render(str(value), True, (0,0,0) if value<=4 else (255,255,255))
+    # the number is never scaled, so small pop-in frames get a sprite as big as the text
+    w, h = math.ceil(max(size, text.get_width())), math.ceil(max(size, text.get_height()))
+    sprite = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.rect(sprite, COLORS.get(value,(60,58,50)), ((w-size)/2, (h-size)/2, size, size), border_radius=8)
+    sprite.blit(text, ((w-text.get_width())/2, (h-text.get_height())/2))
+    sprite = sprite.convert_alpha()
+    TILE_CACHE[key] = sprite
+    if len(TILE_CACHE) > TILE_CACHE_SIZE: TILE_CACHE.popitem(last=False)
+    return sprite
+
+def make_board_layer():
+    layer = pygame.Surface((WIDTH,HEIGHT))
+    layer.fill((250,248,239))
+    # the board is a gap all round and between the tiles, whatever GRID_SIZE
+    span = GRID_SIZE*(TILE_SIZE+GAP)+GAP
+    pygame.draw.rect(layer,(187,173,160),(BOARD_X,TOP_OFFSET,span,span),border_radius=10)
+    for i in range(GRID_SIZE+1):
+        mid = i*(TILE_SIZE+GAP)+GAP//2  # middle of the i-th gap
+        pygame.draw.line(layer,(187,173,160),(BOARD_X,TOP_OFFSET+mid),(BOARD_X+span-1,TOP_OFFSET+mid),3)
+        pygame.draw.line(layer,(187,173,160),(BOARD_X+mid,TOP_OFFSET),(BOARD_X+mid,TOP_OFFSET+span-1),3)
+    return layer.convert()
+
+def make_game_over_layer():
+    layer = pygame.Surface((WIDTH,HEIGHT), pygame.SRCALPHA)
+    layer.fill((0,0,0,150))
+    t = FONT_BIG.render("Game Over",True,(255,255,255))
+    layer.blit(t,(WIDTH//2 - t.get_width()//2, HEIGHT//2-40))
+    return layer.convert_alpha()
+
+def open_window():
+    global WIN, FONT, FONT_BIG, CLOCK, GAME_OVER_LAYER
+    pygame.init()
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("2048")
+    FONT = textcache.get_font("arial", 32, bold=True)
+    FONT_BIG = textcache.get_font("arial", 56, bold=True)
+    CLOCK = pygame.time.Clock()
+    GAME_OVER_LAYER = make_game_over_layer()
+
+def configure(size):
+    """Switch to a size x size board, scaling tiles to fit the window. The
+    default 4x4 keeps the original 100px tiles and 15px gaps."""
+    global GRID_SIZE, TILE_SIZE, GAP, BOARD_X, TILE_FONT, BOARD_LAYER
+    cell = (WIDTH-40)//size
+    GRID_SIZE = size
+    GAP = max(1, round(cell*15/115))
+    TILE_SIZE = cell-GAP
+    BOARD_X = (WIDTH - (size*cell + GAP))//2
+    TILE_FONT = textcache.get_font("arial", max(8, TILE_SIZE*56//100), bold=True)
+    BOARD_LAYER = make_board_layer()
+    TILE_CACHE.clear()
+
 def ease_out(t):
     return 1 - pow(1 - t, 3)
 
+def spawn_step(tile, t):
+    tile.scale = 0.1+0.9*ease_out(t)
+
+def move_step(tile, t, sx, sy, ex, ey):
+    e = ease_out(t)
+    tile.anim_x = sx + (ex-sx)*e
+    tile.anim_y = sy + (ey-sy)*e
+
+def merge_step(tile, t):
+    tile.scale = 1 if t>=1 else 1+0.3*math.sin(t*math.pi)
+
+class Timeline:
+    # Animations advanced once per frame by the main loop. Each entry is
+    # (step, tile, args, start, duration); step(tile, t, *args) is called with
+    # t clamped to 1 on the last frame so every tile lands exactly.
+    def __init__(self):
+        self.entries = []
+    def __bool__(self):
+        return bool(self.entries)
+    def add(self, step, tile, duration, *args):
+        self.entries.append((step, tile, args, time.time(), duration))
+    def tick(self, now):
+        # compact in place: live entries shift down, finished ones fall off the end
+        entries = self.entries
+        keep = 0
+        for entry in entries:
+            step, tile, args, start, dur = entry
+            t = (now-start)/dur
+            if t>=1:
+                step(tile, 1, *args)
+                continue
+            step(tile, t, *args)
+            entries[keep] = entry
+            keep += 1
+        del entries[keep:]
+    def finish(self):
+        for step, tile, args, _, _ in self.entries: step(tile, 1, *args)
+        self.entries.clear()
+
 class Tile:
     def __init__(self, value, r, c):
         self.value = value
         self.row = r
         self.col = c
-        self.x = c*(TILE_SIZE+GAP)+GAP
+        self.x = BOARD_X+c*(TILE_SIZE+GAP)+GAP
         self.y = r*(TILE_SIZE+GAP)+GAP+TOP_OFFSET
         self.anim_x = self.x
         self.anim_y = self.y
         self.scale = 1
     def draw(self):
-        s = self.scale
-        size = TILE_SIZE*s
-        offset = (TILE_SIZE-size)/2
-        rect = pygame.Rect(self.anim_x+offset, self.anim_y+offset, size, size)
-        pygame.draw.rect(WIN, COLORS.get(self.value,(60,58,50)), rect, border_radius=8)
-        text = FONT_BIG.render(str(self.value), True, (0,0,0) if self.value<=4 else (255,255,255))
-        WIN.blit(text, (rect.x+(rect.width-text.get_width())/2, rect.y+(rect.height-text.get_height())/2))
+        sprite = tile_sprite(self.value, self.scale)
+        WIN.blit(sprite, (self.anim_x+(TILE_SIZE-sprite.get_width())/2, self.anim_y+(TILE_SIZE-sprite.get_height())/2))
 
 class Game:
     def __init__(self):
         self.grid = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+        # the engine holds the real state; Tiles below only mirror it for drawing
+        self.engine = bitboard2048.Board() if GRID_SIZE==4 else gridboard2048.Board(GRID_SIZE)
         self.score = 0
-        self.move_animations = []
-        self.merge_animations = []
-        self.spawn_animations = []
+        self.hint = None
+        self.timeline = Timeline()
         self.game_over = False
         self.spawn_tile(True)
         self.spawn_tile(True)
+        board = self.engine.encode()
+        self.history = history2048.History(GRID_SIZE, len(board))
+        self.history.push(board, self.score)
 
     def spawn_tile(self, initial=False):
-        empty = [(r,c) for r in range(GRID_SIZE) for c in range(GRID_SIZE) if self.grid[r][c] is None]
-        if not empty: return
-        r,c = random.choice(empty)
-        t = Tile(2 if random.random()<0.9 else 4, r, c)
+        i = self.engine.spawn()
+        if i is None: return
+        r,c = divmod(i, GRID_SIZE)
+        t = Tile(1 << self.engine.get(i), r, c)
         t.scale = 0.1
         self.grid[r][c] = t
-        self.spawn_animations.append(("spawn", t, time.time(), 0.12))
+        self.timeline.add(spawn_step, t, 0.12)
+
+    @property
+    def board(self):
+        # packed bitboard for the 4x4 AI helpers
+        return self.engine.bits
 
     def valid_moves_exist(self):
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                tile = self.grid[r][c]
-                if tile is None: return True
-                if c+1<GRID_SIZE:
-                    right = self.grid[r][c+1]
-                    if right is not None and right.value==tile.value: return True
-                if r+1<GRID_SIZE:
-                    down = self.grid[r+1][c]
-                    if down is not None and down.value==tile.value: return True
-        return False
+        return self.engine.can_move()
 
     def check_game_over(self):
         if not self.valid_moves_exist(): self.game_over = True
@@ -83,122 +185,97 @@ class Game:
         return [self.grid[r][c] for r in range(GRID_SIZE) for c in range(GRID_SIZE) if self.grid[r][c]]
 
     def animate(self):
-        now = time.time()
-        remove = []
-        for anim in list(self.spawn_animations):
-            _, tile, start, dur = anim
-            t = (now-start)/dur
-            if t>=1: tile.scale=1; remove.append(anim); continue
-            tile.scale = 0.1+0.9*ease_out(t)
-        for anim in list(self.move_animations):
-            tile, sx,sy,ex,ey,start,dur = anim
-            t = (now-start)/dur
-            if t>=1: tile.anim_x=ex; tile.anim_y=ey; tile.x=ex; tile.y=ey; remove.append(anim); continue
-            e = ease_out(t)
-            tile.anim_x = sx + (ex-sx)*e
-            tile.anim_y = sy + (ey-sy)*e
-        for anim in list(self.merge_animations):
-            tile, start, dur = anim
-            t = (now-start)/dur
-            if t>=1: tile.scale=1; remove.append(anim); continue
-            tile.scale = 1+0.3*math.sin(t*math.pi)
-        for r in remove:
-            if r in self.spawn_animations: self.spawn_animations.remove(r)
-            if r in self.move_animations: self.move_animations.remove(r)
-            if r in self.merge_animations: self.merge_animations.remove(r)
+        self.timeline.tick(time.time())
 
     def draw(self):
-        WIN.fill((250,248,239))
-        pygame.draw.rect(WIN,(187,173,160),(GAP,TOP_OFFSET,WIDTH-GAP*2,WIDTH-GAP*2),border_radius=10)
-        WIN.blit(FONT.render(f"Score: {self.score}", True, (0,0,0)), (GAP,40))
-        for r in range(GRID_SIZE+1):
-            pygame.draw.line(WIN,(187,173,160),(GAP,TOP_OFFSET+r*(TILE_SIZE+GAP)-GAP//2),(WIDTH-GAP,TOP_OFFSET+r*(TILE_SIZE+GAP)-GAP//2),3)
-        for c in range(GRID_SIZE+1):
-            pygame.draw.line(WIN,(187,173,160),(GAP+c*(TILE_SIZE+GAP)-GAP//2,TOP_OFFSET),(GAP+c*(TILE_SIZE+GAP)-GAP//2,TOP_OFFSET+GRID_SIZE*(TILE_SIZE+GAP)),3)
+        WIN.blit(BOARD_LAYER,(0,0))
+        WIN.blit(textcache.render(FONT, f"Score: {self.score}", (0,0,0)), (GAP,40))
+        if self.hint:
+            WIN.blit(textcache.render(FONT, f"Hint: {self.hint}", (119,110,101)), (WIDTH//2,40))
         for tile in self.all_tiles(): tile.draw()
-        if self.game_over:
-            surf = pygame.Surface((WIDTH,HEIGHT), pygame.SRCALPHA)
-            surf.fill((0,0,0,150))
-            WIN.blit(surf,(0,0))
-            t = FONT_BIG.render("Game Over",True,(255,255,255))
-            WIN.blit(t,(WIDTH//2 - t.get_width()//2, HEIGHT//2-40))
+        if self.game_over: WIN.blit(GAME_OVER_LAYER,(0,0))
         pygame.display.update()
 
-    def move_line(self, line):
-        new_line = [t for t in line if t is not None]
-        merged_line = []
-        skip=False
-        i=0
-        while i<len(new_line):
-            if skip: skip=False; i+=1; continue
-            if i+1<len(new_line) and new_line[i].value==new_line[i+1].value:
-                new_line[i].value*=2
-                self.score += new_line[i].value
-                new_line[i+1]=None
-                merged_line.append(new_line[i])
-                skip=True
-            else:
-                merged_line.append(new_line[i])
-            i+=1
-        while len(merged_line)<GRID_SIZE:
-            merged_line.append(None)
-        return merged_line
-
     def move(self, direction):
         if self.game_over: return
-        moved=False
-        if direction in ["left","right"]:
-            for r in range(GRID_SIZE):
-                line = self.grid[r][:]
-                if direction=="right": line=line[::-1]
-                new_line = self.move_line(line)
-                if direction=="right": new_line=new_line[::-1]
-                for c in range(GRID_SIZE):
-                    tile = new_line[c]
-                    old_tile = self.grid[r][c]
-                    if tile!=old_tile: moved=True
-                    self.grid[r][c]=tile
-                    if tile:
-                        ex = c*(TILE_SIZE+GAP)+GAP
-                        ey = r*(TILE_SIZE+GAP)+GAP+TOP_OFFSET
-                        self.move_animations.append((tile, tile.x, tile.y, ex, ey, time.time(),0.13))
-                        tile.x=ex; tile.y=ey
-                        tile.anim_x=ex; tile.anim_y=ey
-        else:
+        gained, slides = self.engine.move(direction)
+        if not slides: return
+        # a move during an animation snaps it to its end and applies at once
+        self.timeline.finish()
+        self.hint = None
+        moving = []
+        for src, dst in slides:
+            r,c = divmod(src, GRID_SIZE)
+            moving.append((self.grid[r][c], dst))
+            self.grid[r][c] = None
+        # slides come front tile first, so the leading tile of a merge survives
+        for tile, dst in moving:
+            r,c = divmod(dst, GRID_SIZE)
+            if self.grid[r][c] is None:
+                self.grid[r][c] = tile
+                tile.row, tile.col = r, c
+                ex = BOARD_X+c*(TILE_SIZE+GAP)+GAP
+                ey = r*(TILE_SIZE+GAP)+GAP+TOP_OFFSET
+                self.timeline.add(move_step, tile, 0.13, tile.x, tile.y, ex, ey)
+                tile.x=ex; tile.y=ey
+                tile.anim_x=ex; tile.anim_y=ey
+            else:
+                # the second tile of a merge: the survivor pops as it lands
+                self.timeline.add(merge_step, self.grid[r][c], 0.15)
+            self.grid[r][c].value = 1 << self.engine.get(dst)
+        self.score += gained
+        self.spawn_tile()
+        self.check_game_over()
+        self.history.push(self.engine.encode(), self.score)
+
+    def restore(self, state):
+        board, self.score = state
+        self.engine.decode(board)
+        self.timeline.finish()
+        self.hint = None
+        self.grid = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+        for r in range(GRID_SIZE):
             for c in range(GRID_SIZE):
-                line = [self.grid[r][c] for r in range(GRID_SIZE)]
-                if direction=="down": line=line[::-1]
-                new_line = self.move_line(line)
-                if direction=="down": new_line=new_line[::-1]
-                for r in range(GRID_SIZE):
-                    tile = new_line[r]
-                    old_tile = self.grid[r][c]
-                    if tile!=old_tile: moved=True
-                    self.grid[r][c]=tile
-                    if tile:
-                        ex = c*(TILE_SIZE+GAP)+GAP
-                        ey = r*(TILE_SIZE+GAP)+GAP+TOP_OFFSET
-                        self.move_animations.append((tile, tile.x, tile.y, ex, ey, time.time(),0.13))
-                        tile.x=ex; tile.y=ey
-                        tile.anim_x=ex; tile.anim_y=ey
-        if moved:
-            self.spawn_tile()
-            self.check_game_over()
-            # Animate until done
-            while self.move_animations or self.spawn_animations or self.merge_animations:
-                CLOCK.tick(FPS)
-                self.animate()
-                self.draw()
-
-def main():
+                v = self.engine.get(r*GRID_SIZE+c)
+                if v: self.grid[r][c] = Tile(1 << v, r, c)
+        self.game_over = not self.valid_moves_exist()
+
+    def undo(self):
+        state = self.history.undo()
+        if state: self.restore(state)
+
+    def redo(self):
+        state = self.history.redo()
+        if state: self.restore(state)
+
+def main(size=GRID_SIZE):
+    open_window()
+    configure(size)
     g = Game()
+    solver = None  # started on first H/A press, the worker pool takes a moment
+    autoplay = None  # the solver or n-tuple player making moves, if any
     running = True
     while running:
         CLOCK.tick(FPS)
+        if autoplay and not g.game_over and not g.timeline: autoplay.autoplay(g)
         g.animate()
         g.draw()
         for event in pygame.event.get():
             if event.type==pygame.QUIT: running=False
+            if event.type==pygame.KEYDOWN and event.key in (pygame.K_u, pygame.K_r, pygame.K_s, pygame.K_l):
+                if event.key==pygame.K_u: g.undo()
+                elif event.key==pygame.K_r: g.redo()
+                elif event.key==pygame.K_s: g.history.save(HISTORY_FILE)
+                else:
+                    try: history = history2048.History.load(HISTORY_FILE)
+                    except (OSError, ValueError): continue
+                    if history.size != GRID_SIZE:
+                        configure(history.size)
+                        autoplay = None
+                    g.__init__()
+                    g.history = history
+                    g.restore(history.state())
+                continue
             if g.game_over:
                 if event.type==pygame.KEYDOWN: g.__init__()
                 continue
@@ -207,6 +284,18 @@ def main():
                 elif event.key==pygame.K_RIGHT: g.move("right")
                 elif event.key==pygame.K_UP: g.move("up")
                 elif event.key==pygame.K_DOWN: g.move("down")
+                elif event.key in (pygame.K_h, pygame.K_a) and GRID_SIZE==4:
+                    if solver is None: solver = ai2048.Solver()
+                    if event.key==pygame.K_h: g.hint = solver.best_move(g.board)
+                    else: autoplay = None if autoplay else solver
+                elif event.key==pygame.K_n and GRID_SIZE==4:
+                    # numpy is only needed for the learned player, so import it on demand
+                    import ntuple2048
+                    if autoplay: autoplay = None
+                    elif os.path.exists(ntuple2048.WEIGHTS_FILE): autoplay = ntuple2048.Player()
+    if solver: solver.close()
     pygame.quit()
 
-main()
+if __name__ == "__main__":
+    # optional board size, e.g. "python 2048.py 8" for an 8x8 game
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else GRID_SIZE)
@@ -2,6 +2,7 @@ import pygame
 import random
 import sys
 import os
+import textcache
 
 pygame.init()
 
@@ -94,15 +95,15 @@ def draw_window(ducks, crosshair_pos, score):
     for d in ducks:
         d.draw(WIN)
     WIN.blit(CROSSHAIR, (crosshair_pos[0] - 15, crosshair_pos[1] - 15))
-    font = pygame.font.SysFont("Arial", 24)
-    WIN.blit(font.render(f"Score: {score}", True, (0,0,0)), (10,10))
+    font = textcache.get_font("Arial", 24)
+    WIN.blit(textcache.render(font, f"Score: {score}", (0,0,0)), (10,10))
     pygame.display.update()
 
 def game_loop():
     NUM_DUCKS = 6
     ducks = [Duck() for _ in range(NUM_DUCKS)]
     score = 0
-    font = pygame.font.SysFont("Arial", 28)
+    font = textcache.get_font("Arial", 28)
 
     while True:
         CLOCK.tick(FPS)
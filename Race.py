@@ -3,6 +3,7 @@ import math
 import sys
 import time
 import random
+import textcache
 
 pygame.init()
 
@@ -41,9 +42,9 @@ checkpoint_rect = pygame.Rect(
     6
 )
 
-FONT = pygame.font.SysFont("Arial", 20)
-BIG = pygame.font.SysFont("Arial", 48)
-SMALL = pygame.font.SysFont("Arial", 16)
+FONT = textcache.get_font("Arial", 20)
+BIG = textcache.get_font("Arial", 48)
+SMALL = textcache.get_font("Arial", 16)
 
 LAPS_TO_WIN = 3
 
@@ -200,11 +201,11 @@ def draw_track(surface):
     pygame.draw.rect(surface, (255, 255, 0), checkpoint_rect)
 
 def draw_hud(surface, p1, p2, elapsed):
-    t1 = FONT.render(f"P1 Laps: {p1.laps}/{LAPS_TO_WIN}", True, WHITE)
-    t2 = FONT.render(f"P2 Laps: {p2.laps}/{LAPS_TO_WIN}", True, WHITE)
+    t1 = textcache.render(FONT, f"P1 Laps: {p1.laps}/{LAPS_TO_WIN}", WHITE)
+    t2 = textcache.render(FONT, f"P2 Laps: {p2.laps}/{LAPS_TO_WIN}", WHITE)
     surface.blit(t1, (10, 10))
     surface.blit(t2, (220, 10))
-    t3 = FONT.render(f"Time: {elapsed:.1f}s", True, WHITE)
+    t3 = textcache.render(FONT, f"Time: {elapsed:.1f}s", WHITE)
     surface.blit(t3, (WIDTH - 140, 10))
 
 def run_game():
@@ -268,9 +269,9 @@ def run_game():
             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
             overlay.fill((0,0,0,150))
             WIN.blit(overlay, (0,0))
-            txt = BIG.render(winner + " Wins!", True, WHITE)
+            txt = textcache.render(BIG, winner + " Wins!", WHITE)
             WIN.blit(txt, (WIDTH//2 - txt.get_width()//2, HEIGHT//2 - 30))
-            sub = FONT.render("Press R to restart or ESC to quit", True, WHITE)
+            sub = textcache.render(FONT, "Press R to restart or ESC to quit", WHITE)
             WIN.blit(sub, (WIDTH//2 - sub.get_width()//2, HEIGHT//2 + 30))
             pygame.display.update()
             while True:
@@ -286,8 +287,8 @@ def run_game():
         pygame.display.update()
 
 def main_menu():
-    title_font = pygame.font.SysFont("Arial", 56, True)
-    btn_font = pygame.font.SysFont("Arial", 24, True)
+    title_font = textcache.get_font("Arial", 56, True)
+    btn_font = textcache.get_font("Arial", 24, True)
 
     play_rect = pygame.Rect(WIDTH//2 - 90, HEIGHT//2 - 30, 180, 60)
     quit_rect = pygame.Rect(WIDTH//2 - 90, HEIGHT//2 + 60, 180, 50)
@@ -296,15 +297,15 @@ def main_menu():
         CLOCK.tick(FPS)
         WIN.fill((18,140,60))
 
-        title = title_font.render("Top-Down Racer", True, WHITE)
+        title = textcache.render(title_font, "Top-Down Racer", WHITE)
         WIN.blit(title, (WIDTH//2 - title.get_width()//2, 120))
 
         pygame.draw.rect(WIN, (200,50,50), play_rect, border_radius=10)
         pygame.draw.rect(WIN, (60,60,60), quit_rect, border_radius=10)
 
-        WIN.blit(btn_font.render("Play (2 Player)", True, WHITE),
+        WIN.blit(textcache.render(btn_font, "Play (2 Player)", WHITE),
                  (play_rect.centerx - 75, play_rect.centery - 12))
-        WIN.blit(btn_font.render("Quit", True, WHITE),
+        WIN.blit(textcache.render(btn_font, "Quit", WHITE),
                  (quit_rect.centerx - 25, quit_rect.centery - 12))
 
         pygame.display.update()
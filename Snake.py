@@ -1,11 +1,17 @@
 import pygame
-import random
 import sys
+from collections import deque
+import snakegrid, snakeai, snakearena, textcache
 
 pygame.init()
 
 WIDTH, HEIGHT = 600, 600
 CELL = 20
+COLS, ROWS = WIDTH // CELL, HEIGHT // CELL
+SIM_RATE = 12  # snake moves per second
+FPS = 60  # input polling and drawing, independent of SIM_RATE
+MAX_CATCHUP = 5  # ticks run in one frame after a stall, the rest are dropped
+INPUT_BUFFER = 3  # turns that can wait for the next ticks
 
 win = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Snake With Obstacles")
@@ -19,26 +25,93 @@ WHITE = (255, 255, 255)
 GRAY = (120, 120, 120)
 TRANSLUCENT_BLACK = (0, 0, 0, 160)
 
-font = pygame.font.SysFont("Arial", 30)
-big_font = pygame.font.SysFont("Arial", 50)
+font = textcache.get_font("Arial", 30)
+big_font = textcache.get_font("Arial", 50)
 
 def draw_text(text, x, y, color=BLACK, font_obj=None):
     if font_obj is None:
         font_obj = font
-    surface = font_obj.render(text, True, color)
+    surface = textcache.render(font_obj, text, color)
     win.blit(surface, (x, y))
 
-def random_position():
-    return (random.randrange(0, WIDTH // CELL) * CELL,
-            random.randrange(0, HEIGHT // CELL) * CELL)
-
-def generate_obstacles(n, snake, food):
-    obs = []
-    while len(obs) < n:
-        pos = random_position()
-        if pos not in snake and pos != food:
-            obs.append(pos)
-    return obs
+def cell_rect(grid, cell):
+    x, y = grid.xy(cell)
+    return (x * CELL, y * CELL, CELL, CELL)
+
+ARROWS = {pygame.K_UP: "UP", pygame.K_DOWN: "DOWN", pygame.K_LEFT: "LEFT", pygame.K_RIGHT: "RIGHT"}
+
+class InputQueue:
+    """Turns waiting for the next ticks, oldest first, each stamped with the
+    time it was read. A turn is checked against the last queued direction,
+    not the current one, so "up then left" inside one tick is two turns
+    instead of the left replacing the up."""
+    def __init__(self, direction):
+        self.turns = deque()
+        self.last = direction
+
+    def push(self, direction, stamp):
+        if len(self.turns) >= INPUT_BUFFER: return False
+        if direction in (self.last, snakegrid.OPPOSITE[self.last]): return False
+        self.turns.append((stamp, direction))
+        self.last = direction
+        return True
+
+    def pop(self, now):
+        """The oldest turn pressed by `now`, or None."""
+        if self.turns and self.turns[0][0] <= now:
+            return self.turns.popleft()[1]
+        return None
+
+class Playfield:
+    """Draws a snakegrid.Game incrementally. Obstacles are baked into the
+    background once; each tick repaints only the cells that changed, plus
+    the score corner when the text changed or something moved under it."""
+    def __init__(self, game):
+        self.game = game
+        self.background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.background.fill(WHITE)
+        for pos in game.obstacles:
+            self.background.fill(GRAY, cell_rect(game.grid, pos))
+        self.lines = [("", BLACK), ("", GRAY)]
+        self.hud = pygame.Rect(10, 10, 0, 0)
+        self.full = True
+
+    def paint(self, cell):
+        rect = cell_rect(self.game.grid, cell)
+        kind = self.game.grid.cells[cell]
+        if kind == snakegrid.BODY: win.fill(GREEN, rect)
+        elif kind == snakegrid.FOOD: win.fill(RED, rect)
+        else: win.blit(self.background, rect, rect)
+        return pygame.Rect(rect)
+
+    def draw(self, changed=(), label=""):
+        game = self.game
+        lines = [(f"Score: {game.score}", BLACK), (label, GRAY)]
+        if self.full:
+            win.blit(self.background, (0, 0))
+            for segment in game.snake:
+                win.fill(GREEN, cell_rect(game.grid, segment))
+            if game.food is not None:
+                win.fill(RED, cell_rect(game.grid, game.food))
+            rects = [win.get_rect()]
+        else:
+            rects = [self.paint(cell) for cell in changed]
+        if self.full or lines != self.lines or self.hud.collidelist(rects) >= 0:
+            # repaint the cells under the old and new text, then the text on top
+            surfaces = [textcache.render(font, *line) for line in lines]
+            new_hud = pygame.Rect(10, 10, max(s.get_width() for s in surfaces), 35 + surfaces[1].get_height())
+            hud = self.hud.union(new_hud)
+            grid = game.grid
+            for y in range(hud.top // CELL, min(grid.rows, (hud.bottom - 1) // CELL + 1)):
+                for x in range(hud.left // CELL, min(grid.cols, (hud.right - 1) // CELL + 1)):
+                    self.paint(grid.cell(x, y))
+            win.blit(surfaces[0], (10, 10))
+            win.blit(surfaces[1], (10, 45))
+            rects.append(hud)
+            self.hud = new_hud
+            self.lines = lines
+        self.full = False
+        pygame.display.update(rects)
 
 def pause_screen():
     overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -64,15 +137,23 @@ def pause_screen():
             if event.type == pygame.MOUSEBUTTONDOWN:
                 paused = False
 
+ATTRACT_DELAY = 10000  # ms idle on the start screen before the demo runs
+
 def start_screen():
     running = True
+    idle_since = pygame.time.get_ticks()
     while running:
         win.fill(WHITE)
         draw_text("SNAKE", WIDTH//2 - 80, HEIGHT//2 - 100, BLACK, big_font)
         draw_text("Press SPACE to Start", WIDTH//2 - 140, HEIGHT//2, BLACK)
-        draw_text("ESC to Quit", WIDTH//2 - 70, HEIGHT//2 + 50, BLACK)
+        draw_text("D for a Demo, M for the Arena", WIDTH//2 - 190, HEIGHT//2 + 50, BLACK)
+        draw_text("ESC to Quit", WIDTH//2 - 70, HEIGHT//2 + 100, BLACK)
         pygame.display.update()
 
+        if pygame.time.get_ticks() - idle_since > ATTRACT_DELAY:
+            main(demo=True)
+            idle_since = pygame.time.get_ticks()
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -81,10 +162,91 @@ def start_screen():
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     return
+                if event.key == pygame.K_d:
+                    main(demo=True)
+                    idle_since = pygame.time.get_ticks()
+                if event.key == pygame.K_m:
+                    arena()
+                    idle_since = pygame.time.get_ticks()
                 if event.key == pygame.K_ESCAPE:
                     pygame.quit()
                     sys.exit()
 
+ARENA_CELL = 4
+ARENA_TOP = 40  # status line above the arena
+ARENA_BOTS = 300
+BLUE = (0, 0, 230)
+
+def arena(bots=ARENA_BOTS):
+    """Shared board with hundreds of bots; the player is the blue snake and
+    respawns on death. ESC goes back to the start screen."""
+    cols, rows = WIDTH // ARENA_CELL, (HEIGHT - ARENA_TOP) // ARENA_CELL
+    world = snakearena.Arena(cols, rows, bots, player=True)
+    colors = [BLUE]
+    for i in range(1, len(world.snakes)):
+        color = pygame.Color(0)
+        color.hsva = ((i * 47) % 360, 80, 75, 100)
+        colors.append(color)
+
+    def rect(cell):
+        x, y = world.grid.xy(cell)
+        return pygame.Rect(x * ARENA_CELL, ARENA_TOP + y * ARENA_CELL, ARENA_CELL, ARENA_CELL)
+
+    def paint(cell):
+        kind = world.grid.cells[cell]
+        r = rect(cell)
+        win.fill(colors[world.owner[cell]] if kind == snakegrid.BODY else RED if kind == snakegrid.FOOD
+                 else GRAY if kind == snakegrid.OBSTACLE else WHITE, r)
+        return r
+
+    win.fill(WHITE)
+    for cell in range(world.grid.size):
+        if world.grid.cells[cell] != snakegrid.EMPTY: paint(cell)
+    world.take_changes()
+    pygame.display.update()
+
+    player = world.snakes[0]
+    inputs = InputQueue(snakearena.DIRECTIONS[player.direction])
+    died = 0
+    status = None
+    next_tick = pygame.time.get_ticks()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return
+                if event.key in ARROWS:
+                    inputs.push(ARROWS[event.key], pygame.time.get_ticks())
+
+        now = pygame.time.get_ticks()
+        steps = 0
+        while now >= next_tick and steps < MAX_CATCHUP:
+            turn = inputs.pop(next_tick)
+            if turn: world.turn(0, snakearena.DIRECTIONS.index(turn))
+            if 0 in world.tick():
+                died += 1
+                world.spawn(0)
+                inputs = InputQueue(snakearena.DIRECTIONS[player.direction])
+            next_tick += 1000 / SIM_RATE
+            steps += 1
+        if now >= next_tick:
+            next_tick = now + 1000 / SIM_RATE
+
+        # only cells that changed since the last frame are repainted
+        rects = [paint(cell) for cell in world.take_changes()]
+        text = f"Arena: {len(world.snakes)} snakes   You: {len(player.body)} long, {died} deaths"
+        if text != status:
+            strip = pygame.Rect(0, 0, WIDTH, ARENA_TOP)
+            win.fill(WHITE, strip)
+            win.blit(font.render(text, True, BLUE), (10, 2))
+            rects.append(strip)
+            status = text
+        pygame.display.update(rects)
+        clock.tick(FPS)
+
 def game_over_screen(score):
     win.fill(WHITE)
     draw_text("GAME OVER", WIDTH//2 - 100, HEIGHT//2 - 40, BLACK, big_font)
@@ -104,15 +266,14 @@ def game_over_screen(score):
                     pygame.quit()
                     sys.exit()
 
-def main():
-    snake = [(WIDTH//2, HEIGHT//2)]
-    direction = "RIGHT"
-    change_to = direction
-
-    food = random_position()
-    obstacles = generate_obstacles(20, snake, food)
+def main(demo=False):
+    """demo: attract mode, the autopilot plays until any key is pressed."""
+    game = snakegrid.Game(COLS, ROWS, 20)
+    pilot = snakeai.Autopilot(game.grid) if demo else None
+    inputs = InputQueue(game.direction)
+    field = Playfield(game)
+    next_tick = pygame.time.get_ticks()
 
-    score = 0
     running = True
 
     while running:
@@ -124,67 +285,53 @@ def main():
                 sys.exit()
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP: change_to = "UP"
-                if event.key == pygame.K_DOWN: change_to = "DOWN"
-                if event.key == pygame.K_LEFT: change_to = "LEFT"
-                if event.key == pygame.K_RIGHT: change_to = "RIGHT"
+                if demo:
+                    return
+                if event.key in ARROWS:
+                    inputs.push(ARROWS[event.key], pygame.time.get_ticks())
+                if event.key == pygame.K_a:
+                    pilot = None if pilot else snakeai.Autopilot(game.grid)
+                    inputs = InputQueue(game.direction)
                 if event.key == pygame.K_ESCAPE:
                     pause_screen()
+                    field.full = True
+                    next_tick = pygame.time.get_ticks()
 
             # If player clicks outside window → pause
             if event.type == pygame.ACTIVEEVENT:
-                if mouse_inside == 0:
+                if mouse_inside == 0 and not demo:
                     pause_screen()
-
-        if change_to == "UP" and direction != "DOWN":
-            direction = "UP"
-        if change_to == "DOWN" and direction != "UP":
-            direction = "DOWN"
-        if change_to == "LEFT" and direction != "RIGHT":
-            direction = "LEFT"
-        if change_to == "RIGHT" and direction != "LEFT":
-            direction = "RIGHT"
-
-        x, y = snake[0]
-
-        if direction == "UP": y -= CELL
-        if direction == "DOWN": y += CELL
-        if direction == "LEFT": x -= CELL
-        if direction == "RIGHT": x += CELL
-
-        # Wrap around edges
-        if x < 0: x = WIDTH - CELL
-        if x >= WIDTH: x = 0
-        if y < 0: y = HEIGHT - CELL
-        if y >= HEIGHT: y = 0
-
-        head = (x, y)
-
-        if head in snake or head in obstacles:
-            game_over_screen(score)
-
-        snake.insert(0, head)
-
-        if head == food:
-            score += 1
-            food = random_position()
-        else:
-            snake.pop()
-
-        win.fill(WHITE)
-
-        for pos in obstacles:
-            pygame.draw.rect(win, GRAY, (pos[0], pos[1], CELL, CELL))
-
-        for segment in snake:
-            pygame.draw.rect(win, GREEN, (segment[0], segment[1], CELL, CELL))
-
-        pygame.draw.rect(win, RED, (food[0], food[1], CELL, CELL))
-
-        draw_text(f"Score: {score}", 10, 10)
-
-        pygame.display.update()
-        clock.tick(12)
+                    field.full = True
+                    next_tick = pygame.time.get_ticks()
+
+        # the snake moves SIM_RATE times a second whatever the frame rate
+        now = pygame.time.get_ticks()
+        changed = []
+        steps = 0
+        while now >= next_tick and steps < MAX_CATCHUP:
+            turn = pilot.decide(game) if pilot else inputs.pop(next_tick)
+            if turn: game.turn(turn)
+            food = game.food
+            head, tail = game.step()
+            if game.over: break
+            # between ticks only the head, the old tail and the food can change
+            changed += [head, food, game.food] if tail is None else [head, tail]
+            next_tick += 1000 / SIM_RATE
+            steps += 1
+        if now >= next_tick:  # fell too far behind, don't try to catch up
+            next_tick = now + 1000 / SIM_RATE
+
+        if game.over:
+            if not demo:
+                game_over_screen(game.score)
+            game = snakegrid.Game(COLS, ROWS, 20)
+            pilot = snakeai.Autopilot(game.grid)
+            field = Playfield(game)
+            continue
+
+        label = ("DEMO - press any key" if demo else "AUTOPILOT (A)") if pilot else ""
+        field.draw(changed, label)
+        clock.tick(FPS)
 
 start_screen()
 main()
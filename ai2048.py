@@ -0,0 +1,196 @@
+import os, time, math, random
+from concurrent.futures import ProcessPoolExecutor
+import bitboard2048 as bb
+
+# Expectimax player for 2048 on top of bitboard2048. Max nodes try the four
+# moves, chance nodes average over every empty cell getting a 2 (90%) or a
+# 4 (10%), same odds as Game.spawn_tile. Root moves are searched in parallel
+# worker processes, each keeping its own bounded transposition table.
+
+SPAWN_ODDS = ((1, 0.9), (2, 0.1))  # (nibble, probability)
+MIN_PROB = 0.0001  # stop expanding branches less likely than this
+TABLE_SIZE = 200_000
+TIME_BUDGET = 0.04  # seconds per decision, leaves headroom under 50 ms
+
+# heuristic weights, scored per row and summed over rows and columns
+LOST_PENALTY = 200000.0
+EMPTY_WEIGHT = 270.0
+MERGE_WEIGHT = 700.0
+MONO_WEIGHT = 47.0
+MONO_POWER = 4.0
+SUM_WEIGHT = 11.0
+SUM_POWER = 3.5
+
+_MOVES = (bb.move_left, bb.move_right, bb.move_up, bb.move_down)
+
+def _row_heuristic(cells):
+    total = sum(pow(v, SUM_POWER) for v in cells)
+    empty = cells.count(0)
+    merges, prev, run = 0, 0, 0
+    for v in cells:
+        if not v: continue
+        if v == prev:
+            run += 1
+        elif run:
+            merges += 1 + run
+            run = 0
+        prev = v
+    if run: merges += 1 + run
+    mono_left = mono_right = 0.0
+    for i in range(1, len(cells)):
+        a, b = pow(cells[i-1], MONO_POWER), pow(cells[i], MONO_POWER)
+        if cells[i-1] > cells[i]: mono_left += a - b
+        else: mono_right += b - a
+    return (LOST_PENALTY/4 + EMPTY_WEIGHT*empty + MERGE_WEIGHT*merges
+            - MONO_WEIGHT*min(mono_left, mono_right) - SUM_WEIGHT*total)
+
+ROW_SCORE = [_row_heuristic([(row >> (4*i)) & 0xF for i in range(bb.SIZE)]) for row in range(65536)]
+
+def _rows_score(board):
+    return (ROW_SCORE[board & 0xFFFF] + ROW_SCORE[(board >> 16) & 0xFFFF]
+            + ROW_SCORE[(board >> 32) & 0xFFFF] + ROW_SCORE[board >> 48])
+
+def evaluate(board):
+    return _rows_score(board) + _rows_score(bb.transpose(board))
+
+class TranspositionTable:
+    """board -> (depth, value), dropping the oldest half once it gets full."""
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.entries = {}
+        self.hits = 0
+    def get(self, board, depth):
+        hit = self.entries.get(board)
+        if hit is not None and hit[0] >= depth:
+            self.hits += 1
+            return hit[1]
+        return None
+    def put(self, board, depth, value):
+        entries = self.entries
+        if len(entries) >= self.size:
+            # dicts keep insertion order, so this evicts the oldest entries
+            for key in list(entries)[:self.size//2]:
+                del entries[key]
+        entries[board] = (depth, value)
+
+class Search:
+    def __init__(self, table_size=TABLE_SIZE):
+        self.table = TranspositionTable(table_size)
+        self.deadline = float("inf")
+        self.aborted = False  # the deadline cut some branch of this run short
+    def run(self, board, depth, budget):
+        self.deadline = time.monotonic() + budget
+        self.aborted = False
+        return self.chance_node(board, depth, 1.0)
+    def max_node(self, board, depth, prob):
+        best = 0.0
+        for f in _MOVES:
+            b, _ = f(board)
+            if b != board:
+                v = self.chance_node(b, depth, prob)
+                if v > best: best = v
+        return best
+    def chance_node(self, board, depth, prob):
+        if depth <= 0 or prob < MIN_PROB:
+            return evaluate(board)
+        cached = self.table.get(board, depth)
+        if cached is not None: return cached
+        if time.monotonic() > self.deadline:
+            # out of time: cut the branch short. The search is depth first, so
+            # every node still open now has this cut below it and none of
+            # them may go in the table either
+            self.aborted = True
+            return evaluate(board)
+        empty = bb.empty_cells(board)
+        total = 0.0
+        for i in empty:
+            for nibble, p in SPAWN_ODDS:
+                total += p*self.max_node(board | nibble << (4*i), depth-1, prob*p/len(empty))
+        value = total/len(empty)
+        if not self.aborted: self.table.put(board, depth, value)
+        return value
+
+def search_depth(board):
+    # fewer empty cells means a smaller chance fan-out, so look deeper
+    empty = len(bb.empty_cells(board))
+    return 1 if empty > 10 else 3 if empty <= 2 else 2
+
+_worker_search = None
+
+def _init_worker(table_size):
+    global _worker_search
+    _worker_search = Search(table_size)
+
+def _score_root(board, depth, budget):
+    return _worker_search.run(board, depth, budget)
+
+class Solver:
+    """Picks a direction for a bitboard. workers=0 searches in-process."""
+    def __init__(self, workers=None, table_size=TABLE_SIZE, budget=TIME_BUDGET):
+        if workers is None: workers = min(4, os.cpu_count() or 1)
+        self.search = Search(table_size)
+        self.budget = budget
+        self.workers = workers
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(table_size,))
+        self.last_time = 0.0
+
+    def scores(self, board, depth=None):
+        if depth is None: depth = search_depth(board)
+        children = {}
+        for name in bb.DIRECTIONS:
+            b, _ = bb.move(board, name)
+            if b != board: children[name] = b
+        if self.pool:
+            # with more root moves than workers they run in waves, and the
+            # waves together have to fit in the budget
+            budget = self.budget/max(1, math.ceil(len(children)/self.workers))
+            futures = {name: self.pool.submit(_score_root, b, depth, budget) for name, b in children.items()}
+            return {name: f.result() for name, f in futures.items()}
+        budget = self.budget/max(1, len(children))
+        return {name: self.search.run(b, depth, budget) for name, b in children.items()}
+
+    def best_move(self, board, depth=None):
+        start = time.perf_counter()
+        scores = self.scores(board, depth)
+        self.last_time = time.perf_counter() - start
+        if not scores: return None
+        return max(scores, key=scores.get)
+
+    def autoplay(self, game):
+        """Make one move on a 2048.py Game through Game.move."""
+        direction = self.best_move(game.board)
+        if direction is not None: game.move(direction)
+        return direction
+
+    def close(self):
+        if self.pool: self.pool.shutdown(cancel_futures=True)
+        self.pool = None
+
+def play_headless(solver, seed=None):
+    rng = random.Random(seed)
+    board, _ = bb.spawn_tile(0, rng)
+    board, _ = bb.spawn_tile(board, rng)
+    score = moves = 0
+    times = []
+    while True:
+        d = solver.best_move(board)
+        if d is None: break
+        times.append(solver.last_time)
+        board, gained = bb.move(board, d)
+        score += gained
+        moves += 1
+        board, _ = bb.spawn_tile(board, rng)
+    return score, bb.max_tile(board), moves, times
+
+if __name__ == "__main__":
+    solver = Solver()
+    try:
+        score, top, moves, times = play_headless(solver, seed=1)
+        times.sort()
+        print(f"score {score}, max tile {top}, {moves} moves")
+        print(f"decision time: median {times[len(times)//2]*1000:.1f} ms, "
+              f"p95 {times[int(len(times)*0.95)]*1000:.1f} ms")
+    finally:
+        solver.close()
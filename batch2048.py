@@ -0,0 +1,146 @@
+import time
+import numpy as np
+import bitboard2048 as bb
+
+# Steps N independent 2048 games in lockstep. Boards are an (N, 4, 4) uint8
+# array of log2 tile values. Rows are packed to 16 bits and run through the
+# same row tables bitboard2048 (and so Game.move) uses, so merges and scores
+# are identical; spawning and game-over checks are plain array ops.
+
+DIRECTIONS = bb.DIRECTIONS  # action i means DIRECTIONS[i]
+SPAWN_TWO = 0.9  # same odds as Game.spawn_tile
+
+_LEFT = np.array(bb.ROW_LEFT, dtype=np.uint16)
+_RIGHT = np.array(bb.ROW_RIGHT, dtype=np.uint16)
+_SCORE_LEFT = np.array(bb.SCORE_LEFT, dtype=np.int64)
+_SCORE_RIGHT = np.array(bb.SCORE_RIGHT, dtype=np.int64)
+_SHIFTS = np.array([0, 4, 8, 12], dtype=np.uint16)
+
+def pack_rows(rows):
+    return (rows.astype(np.uint16) << _SHIFTS).sum(-1, dtype=np.uint16)
+
+def unpack_rows(packed):
+    return ((packed[..., None] >> _SHIFTS) & 0xF).astype(np.uint8)
+
+def move(boards, action):
+    """Apply one direction to every board. Returns (new_boards, score_gained)."""
+    vertical = action >= 2
+    view = boards.transpose(0, 2, 1) if vertical else boards
+    packed = pack_rows(view)
+    if action % 2 == 0:
+        out, gained = _LEFT[packed], _SCORE_LEFT[packed]
+    else:
+        out, gained = _RIGHT[packed], _SCORE_RIGHT[packed]
+    out = unpack_rows(out)
+    if vertical: out = out.transpose(0, 2, 1)
+    return np.ascontiguousarray(out), gained.sum(1)
+
+def can_move(boards):
+    empty = (boards == 0).any((1, 2))
+    # two 32768s can't merge, see bitboard2048.MAX_EXP
+    mergeable = boards < bb.MAX_EXP
+    rows = ((boards[:, :, :-1] == boards[:, :, 1:]) & mergeable[:, :, :-1]).any((1, 2))
+    cols = ((boards[:, :-1, :] == boards[:, 1:, :]) & mergeable[:, :-1, :]).any((1, 2))
+    return empty | rows | cols
+
+def from_bitboards(boards):
+    return np.array([[[bb.get_cell(b, r, c) for c in range(4)] for r in range(4)] for b in boards], dtype=np.uint8)
+
+def to_bitboards(boards):
+    flat = boards.reshape(len(boards), 16)
+    return [sum(int(v) << (4*i) for i, v in enumerate(row)) for row in flat]
+
+class BatchGame:
+    def __init__(self, n, seed=None):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start fresh games, all of them or only where mask is True."""
+        idx = np.arange(self.n) if mask is None else np.nonzero(mask)[0]
+        if mask is None:
+            self.boards = np.zeros((self.n, 4, 4), dtype=np.uint8)
+            self.scores = np.zeros(self.n, dtype=np.int64)
+            self.done = np.zeros(self.n, dtype=bool)
+        self.boards[idx] = 0
+        self.scores[idx] = 0
+        self.done[idx] = False
+        self.spawn(idx)
+        self.spawn(idx)
+        return self.boards
+
+    def spawn(self, idx):
+        if not len(idx): return
+        flat = self.boards[idx].reshape(len(idx), 16)
+        # uniform pick among empty cells: random keys, filled cells never win
+        keys = self.rng.random(flat.shape)
+        keys[flat != 0] = -1.0
+        cells = keys.argmax(1)
+        flat[np.arange(len(idx)), cells] = np.where(self.rng.random(len(idx)) < SPAWN_TWO, 1, 2)
+        self.boards[idx] = flat.reshape(-1, 4, 4)
+
+    def step(self, actions):
+        """actions: one index into DIRECTIONS per game. Finished games are left
+        alone. Returns (rewards, moved, done)."""
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.n, dtype=np.int64)
+        moved = np.zeros(self.n, dtype=bool)
+        live = ~self.done
+        for action in range(4):
+            idx = np.nonzero(live & (actions == action))[0]
+            if not len(idx): continue
+            old = self.boards[idx]
+            new, gained = move(old, action)
+            changed = (new != old).any((1, 2))
+            idx = idx[changed]
+            self.boards[idx] = new[changed]
+            rewards[idx] = gained[changed]
+            moved[idx] = True
+        self.scores += rewards
+        idx = np.nonzero(moved)[0]
+        self.spawn(idx)
+        self.done[idx] = ~can_move(self.boards[idx])
+        return rewards, moved, self.done.copy()
+
+def verify(n=64, steps=500, seed=0):
+    """Replay the batch's actions and spawns through bitboard2048 one game at
+    a time and check boards, scores and game-over flags match every step."""
+    sim = BatchGame(n, seed)
+    rng = np.random.default_rng(seed + 1)
+    boards = to_bitboards(sim.boards)
+    scores = [0]*n
+    for _ in range(steps):
+        actions = rng.integers(0, 4, n)
+        before = to_bitboards(sim.boards)
+        _, moved, done = sim.step(actions)
+        after = to_bitboards(sim.boards)
+        for i in range(n):
+            if boards[i] != before[i]: return False
+            if done[i] and not moved[i]: continue
+            b, gained = bb.move(boards[i], DIRECTIONS[actions[i]])
+            if (b != boards[i]) != moved[i]: return False
+            if moved[i]:
+                spawned = after[i] ^ b  # the one cell the batch filled in
+                if b & spawned or spawned.bit_length() == 0: return False
+                b |= spawned
+            scores[i] += gained if moved[i] else 0
+            if b != after[i] or scores[i] != sim.scores[i] or done[i] == bb.can_move(b): return False
+            boards[i] = b
+    return True
+
+def benchmark(n=4096, seed=0):
+    sim = BatchGame(n, seed)
+    rng = np.random.default_rng(seed)
+    steps = 0
+    start = time.perf_counter()
+    while not sim.done.all():
+        sim.step(rng.integers(0, 4, n))
+        steps += 1
+    elapsed = time.perf_counter() - start
+    print(f"{n} games, {steps} steps in {elapsed:.2f}s: {n/elapsed:,.0f} games/sec, "
+          f"{n*steps/elapsed:,.0f} board moves/sec, mean score {sim.scores.mean():.0f}")
+
+if __name__ == "__main__":
+    print("matches bitboard2048:", verify())
+    benchmark()
@@ -0,0 +1,193 @@
+import random, time
+
+# Headless 2048 engine. The 4x4 board is one 64-bit int: row r lives in
+# bits 16*r..16*r+15 and cell (r, c) is the nibble at 4*(4*r + c), holding
+# log2 of the tile value (0 = empty). All moves come from 65536-entry row
+# tables built once at import.
+
+SIZE = 4
+ROW_MASK = 0xFFFF
+MAX_EXP = 15  # a nibble can't hold 65536, so two 32768 tiles never merge
+
+DIRECTIONS = ("left", "right", "up", "down")
+
+def _slide(cells):
+    # same rules as the old Game.move_line: compress, then merge pairs from
+    # the front, each tile merging at most once
+    order = [i for i in range(SIZE) if cells[i]]
+    out, dest, score = [], [0]*SIZE, 0
+    i = 0
+    while i < len(order):
+        v = cells[order[i]]
+        dest[order[i]] = len(out)
+        if i+1 < len(order) and cells[order[i+1]] == v and v < MAX_EXP:
+            dest[order[i+1]] = len(out)
+            out.append(v+1)
+            score += 1 << (v+1)
+            i += 2
+        else:
+            out.append(v)
+            i += 1
+    out += [0]*(SIZE-len(out))
+    return out, dest, score
+
+def _pack_row(cells):
+    return cells[0] | cells[1] << 4 | cells[2] << 8 | cells[3] << 12
+
+def _pack_dest(dest):
+    return dest[0] | dest[1] << 2 | dest[2] << 4 | dest[3] << 6
+
+ROW_LEFT = [0]*65536
+ROW_RIGHT = [0]*65536
+SCORE_LEFT = [0]*65536
+SCORE_RIGHT = [0]*65536
+# per-row destination index of each source cell, 2 bits per cell; only used
+# to animate tiles, never to decide the move itself
+DEST_LEFT = [0]*65536
+DEST_RIGHT = [0]*65536
+
+def _build_tables():
+    for row in range(65536):
+        cells = [(row >> (4*i)) & 0xF for i in range(SIZE)]
+        out, dest, score = _slide(cells)
+        ROW_LEFT[row] = _pack_row(out)
+        SCORE_LEFT[row] = score
+        DEST_LEFT[row] = _pack_dest(dest)
+        out, dest, score = _slide(cells[::-1])
+        ROW_RIGHT[row] = _pack_row(out[::-1])
+        SCORE_RIGHT[row] = score
+        DEST_RIGHT[row] = _pack_dest([SIZE-1-d for d in dest[::-1]])
+
+_build_tables()
+
+def transpose(board):
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+def _apply(board, table, scores):
+    r0 = board & ROW_MASK
+    r1 = (board >> 16) & ROW_MASK
+    r2 = (board >> 32) & ROW_MASK
+    r3 = board >> 48
+    return (table[r0] | table[r1] << 16 | table[r2] << 32 | table[r3] << 48,
+            scores[r0] + scores[r1] + scores[r2] + scores[r3])
+
+def move_left(board):
+    return _apply(board, ROW_LEFT, SCORE_LEFT)
+
+def move_right(board):
+    return _apply(board, ROW_RIGHT, SCORE_RIGHT)
+
+def move_up(board):
+    b, score = _apply(transpose(board), ROW_LEFT, SCORE_LEFT)
+    return transpose(b), score
+
+def move_down(board):
+    b, score = _apply(transpose(board), ROW_RIGHT, SCORE_RIGHT)
+    return transpose(b), score
+
+MOVES = {"left": move_left, "right": move_right, "up": move_up, "down": move_down}
+
+def move(board, direction):
+    """Return (new_board, score_gained). new_board == board if nothing moved."""
+    return MOVES[direction](board)
+
+def line_destinations(board, direction, i):
+    # where each cell of row i (left/right) or column i (up/down) ends up
+    if direction in ("up", "down"):
+        board = transpose(board)
+    row = (board >> (16*i)) & ROW_MASK
+    packed = (DEST_LEFT if direction in ("left", "up") else DEST_RIGHT)[row]
+    return [(packed >> (2*j)) & 3 for j in range(SIZE)]
+
+def can_move(board):
+    for b in (board, transpose(board)):
+        for shift in (0, 16, 32, 48):
+            row = (b >> shift) & ROW_MASK
+            if ROW_LEFT[row] != row or ROW_RIGHT[row] != row:
+                return True
+    return False
+
+def get_cell(board, r, c):
+    return (board >> (4*(SIZE*r + c))) & 0xF
+
+def empty_cells(board):
+    return [i for i in range(SIZE*SIZE) if not (board >> (4*i)) & 0xF]
+
+def spawn_tile(board, rng=random):
+    """Drop a 2 (90%) or 4 (10%) on a random empty cell, like Game.spawn_tile.
+    Returns (new_board, cell_index), cell_index is None on a full board."""
+    empty = empty_cells(board)
+    if not empty: return board, None
+    i = rng.choice(empty)
+    return board | (1 if rng.random() < 0.9 else 2) << (4*i), i
+
+def from_grid(values):
+    board = 0
+    for r in range(SIZE):
+        for c in range(SIZE):
+            v = values[r][c]
+            if v: board |= (v.bit_length()-1) << (4*(SIZE*r + c))
+    return board
+
+def to_grid(board):
+    return [[(1 << e) if e else 0 for e in (get_cell(board, r, c) for c in range(SIZE))] for r in range(SIZE)]
+
+def max_tile(board):
+    return 1 << max((board >> (4*i)) & 0xF for i in range(SIZE*SIZE))
+
+class Board:
+    """Mutable board with the same interface as gridboard2048.Board, so Game
+    can drive either; the packed int is in .bits."""
+    size = SIZE
+    def __init__(self, bits=0):
+        self.bits = bits
+    def get(self, i):
+        return (self.bits >> (4*i)) & 0xF
+    def spawn(self, rng=random):
+        self.bits, i = spawn_tile(self.bits, rng)
+        return i
+    def can_move(self):
+        return can_move(self.bits)
+    def encode(self):
+        return self.bits.to_bytes(8, "little")
+    def decode(self, data):
+        self.bits = int.from_bytes(data, "little")
+    def move(self, direction):
+        bits, gained = move(self.bits, direction)
+        slides = []
+        if bits != self.bits:
+            horizontal = direction in ("left", "right")
+            order = range(SIZE) if direction in ("left", "up") else range(SIZE-1, -1, -1)
+            for i in range(SIZE):
+                dests = line_destinations(self.bits, direction, i)
+                for j in order:
+                    src, dst = (SIZE*i + j, SIZE*i + dests[j]) if horizontal else (SIZE*j + i, SIZE*dests[j] + i)
+                    if src != dst and self.get(src): slides.append((src, dst))
+            self.bits = bits
+        return gained, slides
+
+def benchmark(n=1_000_000, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    b, _ = spawn_tile(0, rng)
+    for _ in range(256):
+        b, _ = spawn_tile(b, rng)
+        if not can_move(b): b, _ = spawn_tile(0, rng)
+        b, _ = move(b, rng.choice(DIRECTIONS))
+        boards.append(b)
+    funcs = (move_left, move_right, move_up, move_down)
+    start = time.perf_counter()
+    for i in range(n):
+        funcs[i & 3](boards[i & 255])
+    elapsed = time.perf_counter() - start
+    print(f"{n} moves in {elapsed:.2f}s ({n/elapsed:,.0f} moves/sec)")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,188 @@
+import os, sys, time, dbm, shutil, tempfile, tracemalloc
+from collections import OrderedDict
+import numpy as np
+import minefield
+
+# Endless Minesweeper world made of CHUNK x CHUNK squares. A chunk's mines are
+# a pure function of (seed, chunk coordinates), so only what the player did
+# to it (revealed and flagged bits) ever needs storing. At most MAX_LOADED
+# chunks live in memory as Minefields; the least recently used ones are
+# packed into a dbm file and rebuilt from the seed when they come back.
+
+CHUNK = 32
+DENSITY = 99/480  # expert density, zero regions stay finite
+MAX_LOADED = 48
+FLOOD_RADIUS = 3  # chunks one reveal may flood into, the rest waits until seen
+MAX_PENDING = 256  # chunks of waiting flood kept in memory, older ones go to the dbm
+
+def _key(cy, cx):
+    return f"{cy},{cx}".encode()
+
+def _pending_key(cy, cx):
+    return b"p" + _key(cy, cx)
+
+class ChunkField:
+    rows = cols = None  # unbounded
+
+    def __init__(self, seed=None, path=None, density=DENSITY):
+        self.seed = int(np.random.SeedSequence(seed).entropy % (1 << 63)) if seed is None else seed
+        self.density = density
+        self.start = (CHUNK//2, CHUNK//2)  # its neighbourhood never holds mines
+        self.tmpdir = None
+        if path is None:
+            self.tmpdir = tempfile.mkdtemp(prefix="minesweeper-")
+            path = os.path.join(self.tmpdir, "chunks")
+        self.db = dbm.open(path, "n")
+        self.loaded = OrderedDict()  # (cy, cx) -> Minefield, oldest first
+        self.pending = {}  # (cy, cx) -> local cells a far flood still has to open
+        self.exploded = None
+        self.opened = 0
+        self.stored = 0
+
+    def chunk_mines(self, cy, cx):
+        rng = np.random.default_rng([self.seed, cy % (1 << 32), cx % (1 << 32)])
+        mines = rng.random((CHUNK, CHUNK)) < self.density
+        sr, sc = self.start
+        if (cy, cx) == (sr//CHUNK, sc//CHUNK):
+            r, c = sr % CHUNK, sc % CHUNK
+            mines[max(0, r-1):r+2, max(0, c-1):c+2] = False
+        return mines
+
+    def _build(self, cy, cx):
+        field = minefield.Minefield(CHUNK, CHUNK, 0, mines=self.chunk_mines(cy, cx))
+        # counts along the edges see the neighbouring chunks' mines too
+        around = np.block([[self.chunk_mines(cy+dy, cx+dx) for dx in (-1, 0, 1)] for dy in (-1, 0, 1)])
+        pad = around[CHUNK-1:2*CHUNK+1, CHUNK-1:2*CHUNK+1].view(np.uint8)
+        field.counts[:] = 0
+        for dr, dc in minefield.NEIGHBORS:
+            field.counts += pad[1+dr:CHUNK+1+dr, 1+dc:CHUNK+1+dc]
+        data = self.db.get(_key(cy, cx))
+        if data is not None:
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))[:2*CHUNK*CHUNK].astype(bool)
+            field.revealed[:] = bits[:CHUNK*CHUNK].reshape(CHUNK, CHUNK)
+            field.flagged[:] = bits[CHUNK*CHUNK:].reshape(CHUNK, CHUNK)
+        return field
+
+    def chunk(self, cy, cx):
+        key = (cy, cx)
+        field = self.loaded.get(key)
+        if field is not None:
+            self.loaded.move_to_end(key)
+            return field
+        field = self.loaded[key] = self._build(cy, cx)
+        while len(self.loaded) > MAX_LOADED:
+            self._evict(*self.loaded.popitem(last=False))
+        return field
+
+    def _evict(self, key, field):
+        # untouched chunks come back from the seed alone, so drop any record
+        # left from before a flag was taken off again
+        if field.revealed.any() or field.flagged.any():
+            self.db[_key(*key)] = np.packbits(np.concatenate([field.revealed.ravel(), field.flagged.ravel()])).tobytes()
+            self.stored += 1
+        elif _key(*key) in self.db:
+            del self.db[_key(*key)]
+
+    def _take_pending(self, key):
+        """Every cell a flood left waiting in chunk key, in memory or parked."""
+        cells = self.pending.pop(key, set())
+        data = self.db.get(_pending_key(*key))
+        if data is not None:
+            del self.db[_pending_key(*key)]
+            cells |= {divmod(int(i), CHUNK) for i in np.frombuffer(data, dtype=np.uint16)}
+        return cells
+
+    def _defer(self, key, cells):
+        self.pending[key] = cells
+        while len(self.pending) > MAX_PENDING:
+            # park the oldest in the dbm until its chunk is seen
+            old = next(iter(self.pending))
+            cells = self._take_pending(old)
+            self.db[_pending_key(*old)] = np.array([r*CHUNK + c for r, c in cells], dtype=np.uint16).tobytes()
+
+    def _flood(self, work, origin):
+        """Open local cells per chunk, spilling into neighbours from zeros on
+        the chunk edges. Chunks beyond FLOOD_RADIUS of origin are deferred."""
+        while work:
+            key, cells = work.popitem()
+            cells |= self._take_pending(key)
+            if max(abs(key[0]-origin[0]), abs(key[1]-origin[1])) > FLOOD_RADIUS:
+                self._defer(key, cells)
+                continue
+            field = self.chunk(*key)
+            opened = [field.reveal(r, c) for r, c in cells]
+            opened = np.concatenate(opened) if opened else np.empty(0, dtype=np.int64)
+            self.opened += opened.size
+            if field.exploded is not None and self.exploded is None:
+                self.exploded = (key[0]*CHUNK + field.exploded[0], key[1]*CHUNK + field.exploded[1])
+            rows, cols = field.cells(opened)
+            # a mine opened by a wrong click has a count too, but never floods
+            edge = (field.counts[rows, cols] == 0) & ~field.mine[rows, cols] & ((rows == 0) | (rows == CHUNK-1) | (cols == 0) | (cols == CHUNK-1))
+            for r, c in zip(rows[edge].tolist(), cols[edge].tolist()):
+                for dr, dc in minefield.NEIGHBORS:
+                    rr, cc = r+dr, c+dc
+                    if 0 <= rr < CHUNK and 0 <= cc < CHUNK: continue
+                    target = (key[0] + rr//CHUNK, key[1] + cc//CHUNK)
+                    work.setdefault(target, set()).add((rr % CHUNK, cc % CHUNK))
+
+    def reveal(self, r, c):
+        key = (r//CHUNK, c//CHUNK)
+        self._flood({key: {(r % CHUNK, c % CHUNK)}}, key)
+
+    def toggle_flag(self, r, c):
+        return self.chunk(r//CHUNK, c//CHUNK).toggle_flag(r % CHUNK, c % CHUNK)
+
+    def window(self, row, col, rows, cols):
+        """(mine, revealed, flagged, counts) copies of a world rectangle,
+        loading or generating every chunk it overlaps."""
+        out = [np.zeros((rows, cols), dtype=t) for t in (bool, bool, bool, np.uint8)]
+        for cy in range(row//CHUNK, (row+rows-1)//CHUNK + 1):
+            for cx in range(col//CHUNK, (col+cols-1)//CHUNK + 1):
+                if (cy, cx) in self.pending or ((cy, cx) not in self.loaded and _pending_key(cy, cx) in self.db):
+                    self._flood({(cy, cx): set()}, (cy, cx))
+                field = self.chunk(cy, cx)
+                r0, c0 = max(row, cy*CHUNK), max(col, cx*CHUNK)
+                r1, c1 = min(row+rows, (cy+1)*CHUNK), min(col+cols, (cx+1)*CHUNK)
+                src = (slice(r0 - cy*CHUNK, r1 - cy*CHUNK), slice(c0 - cx*CHUNK, c1 - cx*CHUNK))
+                dst = (slice(r0-row, r1-row), slice(c0-col, c1-col))
+                for o, layer in zip(out, (field.mine, field.revealed, field.flagged, field.counts)):
+                    o[dst] = layer[src]
+        return out
+
+    @property
+    def lost(self):
+        return self.exploded is not None
+
+    won = False
+
+    def close(self):
+        self.db.close()
+        if self.tmpdir: shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+def benchmark(steps=400, view=(12, 12), seed=0):
+    """Walk the camera one cell per step in a straight line, opening a safe
+    hidden cell in view each step, and watch memory stay put."""
+    tracemalloc.start()
+    field = ChunkField(seed)
+    rng = np.random.default_rng(seed)
+    row, col = field.start
+    field.reveal(row, col)
+    start = time.perf_counter()
+    for step in range(steps):
+        col += 8  # well over a chunk every four steps
+        mine, revealed, _, _ = field.window(row, col, *view)
+        choices = np.argwhere(~mine & ~revealed)
+        if len(choices):
+            r, c = choices[rng.integers(len(choices))]
+            field.reveal(row + int(r), col + int(c))
+        if step in (steps//4, steps-1):
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"step {step+1}: {col//CHUNK} chunks out, {len(field.loaded)} loaded, "
+                  f"{field.stored} stored, {field.opened} cells open, {current/1e6:.2f} MB traced")
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed/steps*1000:.2f} ms per step (window + reveal)")
+    field.close()
+    tracemalloc.stop()
+
+if __name__ == "__main__":
+    benchmark(steps=int(sys.argv[1]) if len(sys.argv) > 1 else 400)
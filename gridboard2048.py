@@ -0,0 +1,132 @@
+import random
+
+# NxN 2048 board for the big-board modes. Cells hold log2 tile values in a
+# flat list. Alongside it the board keeps, updated one cell at a time:
+#   - the empty cells as a list plus reverse index, for O(1) random spawns
+#   - a bitmask of filled cells per row and per column
+#   - the number of equal adjacent pairs per row, per column and in total
+# so a move only touches lines that will change and game over is a check of
+# two counters instead of a scan.
+
+class Board:
+    def __init__(self, size):
+        n = self.size = size
+        self.cells = [0]*(n*n)
+        self.empty = list(range(n*n))
+        self.empty_pos = list(range(n*n))  # index into self.empty, -1 when filled
+        self.row_mask = [0]*n  # bit c set when (r, c) holds a tile
+        self.col_mask = [0]*n  # bit r set when (r, c) holds a tile
+        self.row_pairs = [0]*n
+        self.col_pairs = [0]*n
+        self.pairs = 0
+
+    def get(self, i):
+        return self.cells[i]
+
+    def set(self, i, v):
+        cells = self.cells
+        old = cells[i]
+        if old == v: return
+        n = self.size
+        r, c = divmod(i, n)
+        # drop the pairs the old value made with its neighbours, add the new ones
+        for j, horizontal in ((i-1, c > 0), (i+1, c < n-1)):
+            if horizontal and cells[j]:
+                d = (cells[j] == v and v != 0) - (cells[j] == old and old != 0)
+                self.row_pairs[r] += d
+                self.pairs += d
+        for j in (i-n, i+n):
+            if 0 <= j < n*n and cells[j]:
+                d = (cells[j] == v and v != 0) - (cells[j] == old and old != 0)
+                self.col_pairs[c] += d
+                self.pairs += d
+        cells[i] = v
+        if not old:
+            # swap-remove from the empty list
+            k = self.empty_pos[i]
+            last = self.empty.pop()
+            if last != i:
+                self.empty[k] = last
+                self.empty_pos[last] = k
+            self.empty_pos[i] = -1
+            self.row_mask[r] |= 1 << c
+            self.col_mask[c] |= 1 << r
+        elif not v:
+            self.empty_pos[i] = len(self.empty)
+            self.empty.append(i)
+            self.row_mask[r] &= ~(1 << c)
+            self.col_mask[c] &= ~(1 << r)
+
+    def spawn(self, rng=random):
+        """Drop a 2 (90%) or 4 (10%) on a random empty cell, like Game.spawn_tile.
+        Returns the cell index, or None on a full board."""
+        if not self.empty: return None
+        i = self.empty[rng.randrange(len(self.empty))]
+        self.set(i, 1 if rng.random() < 0.9 else 2)
+        return i
+
+    def can_move(self):
+        return bool(self.empty) or self.pairs > 0
+
+    def encode(self):
+        return bytes(self.cells)
+
+    def decode(self, data):
+        # rebuild the indexes from scratch through set()
+        self.__init__(self.size)
+        for i, v in enumerate(data):
+            if v: self.set(i, v)
+
+    def move(self, direction):
+        """Slide and merge with the Game.move_line rules. Returns
+        (score_gained, slides) where slides lists (src, dst) cell indexes of
+        every tile that moved, front tile of each line first. No slides means
+        the board did not change."""
+        n = self.size
+        horizontal = direction in ("left", "right")
+        forward = direction in ("left", "up")
+        masks = self.row_mask if horizontal else self.col_mask
+        line_pairs = self.row_pairs if horizontal else self.col_pairs
+        full = (1 << n) - 1
+        cells = self.cells
+        gained = 0
+        slides = []
+        for line in range(n):
+            mask = masks[line]
+            if not mask: continue
+            k = bin(mask).count("1")
+            packed = (1 << k) - 1 if forward else full ^ ((1 << (n-k)) - 1)
+            if mask == packed and not line_pairs[line]: continue  # nothing can move
+            # filled positions along the line, front first
+            pos = []
+            while mask:
+                low = mask & -mask
+                pos.append(low.bit_length() - 1)
+                mask ^= low
+            if not forward: pos.reverse()
+            if horizontal:
+                index = [line*n + p for p in pos]
+                dest = [line*n + (t if forward else n-1-t) for t in range(k)]
+            else:
+                index = [p*n + line for p in pos]
+                dest = [(t if forward else n-1-t)*n + line for t in range(k)]
+            values = [cells[i] for i in index]
+            out = []
+            i = 0
+            while i < k:
+                slot = dest[len(out)]
+                if i+1 < k and values[i] == values[i+1]:
+                    out.append(values[i]+1)
+                    gained += 1 << (values[i]+1)
+                    slides.append((index[i], slot))
+                    slides.append((index[i+1], slot))
+                    i += 2
+                else:
+                    out.append(values[i])
+                    slides.append((index[i], slot))
+                    i += 1
+            filled = set(dest[:len(out)])
+            for i in index:
+                if i not in filled: self.set(i, 0)
+            for slot, v in zip(dest, out): self.set(slot, v)
+        return gained, [s for s in slides if s[0] != s[1]]
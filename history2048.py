@@ -0,0 +1,82 @@
+import struct
+
+# Undo/redo history for 2048. Every state is a fixed-size record in one
+# bytearray: the engine's packed board (8 bytes for the 4x4 bitboard, one
+# byte per cell otherwise) followed by the score as a little-endian uint64.
+# Stepping back or forward only moves a cursor, and a new move after an undo
+# just truncates the redo tail.
+
+MAGIC = b"2048H"
+VERSION = 1
+_HEADER = struct.Struct("<5sBHHII")  # magic, version, board size, board bytes, records, cursor
+_SCORE = struct.Struct("<Q")
+
+class History:
+    def __init__(self, size, board_bytes):
+        self.size = size
+        self.board_bytes = board_bytes
+        self.record = board_bytes + _SCORE.size
+        self.data = bytearray()
+        self.cursor = -1  # index of the current state
+
+    def __len__(self):
+        return len(self.data)//self.record
+
+    def push(self, board, score):
+        end = (self.cursor+1)*self.record
+        del self.data[end:]
+        self.data += board
+        self.data += _SCORE.pack(score)
+        self.cursor += 1
+
+    def state(self, i=None):
+        """(board_bytes, score) of record i, the current one by default."""
+        if i is None: i = self.cursor
+        start = i*self.record
+        mid = start + self.board_bytes
+        return bytes(self.data[start:mid]), _SCORE.unpack_from(self.data, mid)[0]
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self)-1
+
+    def undo(self):
+        if not self.can_undo(): return None
+        self.cursor -= 1
+        return self.state()
+
+    def redo(self):
+        if not self.can_redo(): return None
+        self.cursor += 1
+        return self.state()
+
+    def seek(self, i):
+        self.cursor = max(0, min(i, len(self)-1))
+        return self.state()
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, self.size, self.board_bytes, len(self), self.cursor))
+            f.write(self.data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{path} is truncated")
+            magic, version, size, board_bytes, count, cursor = _HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a 2048 history file")
+            if size < 2 or board_bytes != (8 if size == 4 else size*size):
+                raise ValueError(f"{path} has a bad board size")
+            history = cls(size, board_bytes)
+            history.data = bytearray(f.read())
+        if len(history) != count:
+            raise ValueError(f"{path} is truncated")
+        if not 0 <= cursor < count:
+            raise ValueError(f"{path} has a bad cursor")
+        history.cursor = cursor
+        return history
@@ -0,0 +1,171 @@
+import os, time, struct
+import numpy as np
+
+# Array-backed Minesweeper board, headless. Every layer is a (rows+2, cols+2)
+# array with a one-cell border so neighbour offsets never need bounds checks;
+# the border counts as already revealed so flood fills stop there. The
+# public mine/revealed/flagged/counts attributes are views of the inside.
+
+MAGIC = b"MSWP"
+VERSION = 1
+# magic, version, rows, cols, mines; then the mine, revealed and flagged
+# layers as packed bitplanes of ceil(rows*cols/8) bytes each. Counts are
+# recomputed on load.
+_HEADER = struct.Struct("<4sBIII")
+
+NEIGHBORS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc]
+
+class Minefield:
+    def __init__(self, rows, cols, num_mines, seed=None, mines=None):
+        """mines: optional (rows, cols) bool array to use instead of a random layout."""
+        self.rows, self.cols, self.num_mines = rows, cols, num_mines
+        self.width = cols + 2
+        shape = (rows + 2, cols + 2)
+        self._mine = np.zeros(shape, dtype=bool)
+        self._revealed = np.ones(shape, dtype=bool)
+        self._revealed[1:-1, 1:-1] = False
+        self._flagged = np.zeros(shape, dtype=bool)
+        self._counts = np.zeros(shape, dtype=np.uint8)
+        self.mine = self._mine[1:-1, 1:-1]
+        self.revealed = self._revealed[1:-1, 1:-1]
+        self.flagged = self._flagged[1:-1, 1:-1]
+        self.counts = self._counts[1:-1, 1:-1]
+        self._offsets = np.array([dr*self.width + dc for dr, dc in NEIGHBORS])
+        if mines is None:
+            self.place_mines(np.random.default_rng(seed))
+        else:
+            self.mine[:] = mines
+            self.num_mines = int(self.mine.sum())
+        self.calculate_neighbors()
+        self.safe_left = rows*cols - self.num_mines
+        self.exploded = None
+
+    def place_mines(self, rng):
+        cells = rng.choice(self.rows*self.cols, self.num_mines, replace=False)
+        self.mine[cells // self.cols, cells % self.cols] = True
+
+    def calculate_neighbors(self):
+        # one pass per neighbour offset over the whole board
+        m = self._mine.view(np.uint8)
+        counts = self.counts
+        counts[:] = 0
+        for dr, dc in NEIGHBORS:
+            counts += m[1+dr:self.rows+1+dr, 1+dc:self.cols+1+dc]
+
+    def index(self, r, c):
+        return (r+1)*self.width + c + 1
+
+    def cells(self, flat):
+        """Padded flat indexes back to (rows, cols) arrays."""
+        return flat // self.width - 1, flat % self.width - 1
+
+    def reveal(self, r, c):
+        """Open a cell, flooding out from zero counts with an array-wide BFS
+        frontier. Returns the padded flat indexes of every newly opened cell."""
+        revealed = self._revealed.reshape(-1)
+        flagged = self._flagged.reshape(-1)
+        counts = self._counts.reshape(-1)
+        i = self.index(r, c)
+        if revealed[i] or flagged[i]:
+            return np.empty(0, dtype=np.int64)
+        revealed[i] = True
+        opened = np.array([i])
+        if self._mine.reshape(-1)[i]:
+            self.exploded = (r, c)
+            return opened
+        found = [opened]
+        frontier = opened if counts[i] == 0 else opened[:0]
+        while frontier.size:
+            nb = (frontier[:, None] + self._offsets).reshape(-1)
+            nb = np.unique(nb[~(revealed[nb] | flagged[nb])])
+            revealed[nb] = True
+            found.append(nb)
+            # cells next to a zero never hold mines, so only the zeros spread further
+            frontier = nb[counts[nb] == 0]
+        opened = np.concatenate(found)
+        self.safe_left -= opened.size
+        return opened
+
+    def window(self, r, c, rows, cols):
+        """(mine, revealed, flagged, counts) views of a rectangle."""
+        area = (slice(r, r+rows), slice(c, c+cols))
+        return self.mine[area], self.revealed[area], self.flagged[area], self.counts[area]
+
+    def toggle_flag(self, r, c):
+        if self.revealed[r, c]: return False
+        self.flagged[r, c] = not self.flagged[r, c]
+        return True
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, self.rows, self.cols, self.num_mines))
+            for layer in (self.mine, self.revealed, self.flagged):
+                f.write(np.packbits(layer).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        if os.path.getsize(path) < _HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        with open(path, "rb") as f:
+            magic, version, rows, cols, num_mines = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a Minesweeper save")
+        n = rows*cols
+        plane = (n + 7)//8
+        if os.path.getsize(path) != _HEADER.size + 3*plane:
+            raise ValueError(f"{path} is truncated")
+        # unpack straight from the mapped file into the padded layers
+        data = np.memmap(path, dtype=np.uint8, mode="r", offset=_HEADER.size)
+        field = cls(rows, cols, num_mines, mines=np.unpackbits(data[:plane], count=n).reshape(rows, cols))
+        field.revealed[:] = np.unpackbits(data[plane:2*plane], count=n).reshape(rows, cols)
+        field.flagged[:] = np.unpackbits(data[2*plane:], count=n).reshape(rows, cols)
+        del data
+        field.safe_left -= int((field.revealed & ~field.mine).sum())
+        hit = np.argwhere(field.revealed & field.mine)
+        if len(hit): field.exploded = tuple(int(v) for v in hit[0])
+        return field
+
+    @property
+    def lost(self):
+        return self.exploded is not None
+
+    @property
+    def won(self):
+        return self.safe_left == 0
+
+def benchmark(rows=1000, cols=1000, density=0.15, seed=0):
+    start = time.perf_counter()
+    field = Minefield(rows, cols, int(rows*cols*density), seed)
+    built = time.perf_counter() - start
+    # flood from a zero cell somewhere in the middle of the list
+    zeros = np.argwhere((field.counts == 0) & ~field.mine)
+    r, c = zeros[len(zeros)//2]
+    start = time.perf_counter()
+    opened = field.reveal(int(r), int(c))
+    flood = time.perf_counter() - start
+    print(f"{rows}x{cols}: built in {built*1000:.0f} ms, flood fill opened "
+          f"{opened.size} cells in {flood*1000:.1f} ms, {field.safe_left} safe cells left")
+
+def save_benchmark(rows=1000, cols=1000, density=0.15, seed=0, path="minefield_bench.bin"):
+    field = Minefield(rows, cols, int(rows*cols*density), seed)
+    zeros = np.argwhere((field.counts == 0) & ~field.mine)
+    for r, c in zeros[::max(1, len(zeros)//200)]:
+        field.reveal(int(r), int(c))
+    field.flagged[field.mine & (np.arange(cols) % 3 == 0)] = True
+    start = time.perf_counter()
+    field.save(path)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = Minefield.load(path)
+    elapsed = time.perf_counter() - start
+    same = all((a == b).all() for a, b in zip((field._mine, field._revealed, field._flagged, field._counts),
+                                             (loaded._mine, loaded._revealed, loaded._flagged, loaded._counts)))
+    print(f"{rows}x{cols}: saved in {saved*1000:.1f} ms, loaded in {elapsed*1000:.1f} ms, "
+          f"{os.path.getsize(path)/1024:.0f} KiB on disk, round trip {'ok' if same else 'MISMATCH'}")
+    os.remove(path)
+
+if __name__ == "__main__":
+    benchmark()
+    benchmark(density=0.05)
+    save_benchmark()
+    save_benchmark(100, 100)
@@ -0,0 +1,119 @@
+import sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import minefield, minesolver
+
+# Minesweeper boards that never need a guess. The start cell and its
+# neighbours are kept free of mines so opening it always floods; a random
+# layout is then kept only if minesolver can clear it from there using
+# certain deductions alone. Rejection sampling is slow on dense boards, so
+# BoardPool keeps a few ready boards per size, generated in worker processes.
+
+MAX_TRIES = 2000  # layouts tried per generate() call before giving up
+POOL_SIZE = 3  # ready boards kept per (rows, cols, mines)
+POOL_MAX_CELLS = 64*64  # bigger boards are too slow to check, they only get a safe start
+
+def start_cell(rows, cols):
+    return rows//2, cols//2
+
+def safe_start(rows, cols, num_mines, rng=None):
+    """Random layout with no mine on or next to the start cell."""
+    rng = np.random.default_rng(rng)
+    r, c = start_cell(rows, cols)
+    allowed = np.ones((rows, cols), dtype=bool)
+    allowed[max(0, r-1):r+2, max(0, c-1):c+2] = False
+    cells = np.flatnonzero(allowed)
+    mines = np.zeros(rows*cols, dtype=bool)
+    mines[rng.choice(cells, min(num_mines, cells.size), replace=False)] = True
+    return mines.reshape(rows, cols)
+
+def no_guess(mines, start):
+    """True if the board can be cleared from start by logic alone."""
+    field = minefield.Minefield(*mines.shape, 0, mines=mines)
+    field.reveal(*start)
+    while not field.won:
+        sol = minesolver.solve(field.revealed, field.counts, field.num_mines)
+        safe = [v for v in sol.safe if not field.revealed[v]]
+        if not safe: return False
+        for v in safe: field.reveal(*v)
+        if field.lost: return False  # an estimated component got it wrong
+    return True
+
+def generate(rows, cols, num_mines, seed=None, max_tries=MAX_TRIES):
+    """A no-guess layout as a (rows, cols) bool array, or None if none of
+    max_tries random layouts was solvable."""
+    rng = np.random.default_rng(seed)
+    start = start_cell(rows, cols)
+    for _ in range(max_tries):
+        mines = safe_start(rows, cols, num_mines, rng)
+        if no_guess(mines, start): return mines
+    return None
+
+class BoardPool:
+    """Keeps up to `size` no-guess boards ready for each configuration.
+    get() never blocks unless asked to: with nothing ready it hands out a
+    plain safe-start board and tops the cache up in the background."""
+    def __init__(self, workers=None, size=POOL_SIZE, seed=None):
+        self.executor = ProcessPoolExecutor(workers)
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.ready = {}  # config -> deque of layouts
+        self.pending = {}  # config -> futures still being generated
+
+    def refill(self, rows, cols, num_mines):
+        config = (rows, cols, num_mines)
+        if self.executor is None or rows*cols > POOL_MAX_CELLS: return
+        ready = self.ready.setdefault(config, deque())
+        pending = self.pending.setdefault(config, [])
+        still = []
+        for job in pending:
+            if not job.done(): still.append(job)
+            elif job.cancelled() or job.exception() is not None: continue  # dropped, topped up below
+            elif job.result() is not None: ready.append(job.result())
+        try:
+            while len(ready) + len(still) < self.size:
+                still.append(self.executor.submit(generate, rows, cols, num_mines, int(self.rng.integers(1 << 32))))
+        except BrokenProcessPool:
+            # a worker died: go on with plain safe-start boards
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            still = []
+        pending[:] = still
+
+    def get(self, rows, cols, num_mines, wait=0.0):
+        """(mines, start, no_guess). wait: seconds to block for a board when
+        none is ready yet, e.g. for the very first game."""
+        config = (rows, cols, num_mines)
+        self.refill(*config)
+        if not self.ready.get(config) and wait and self.pending.get(config):
+            wait_futures(self.pending[config], timeout=wait, return_when="FIRST_COMPLETED")
+            self.refill(*config)
+        start = start_cell(rows, cols)
+        if self.ready.get(config):
+            mines = self.ready[config].popleft()
+            self.refill(*config)
+            return mines, start, True
+        return safe_start(rows, cols, num_mines, self.rng), start, False
+
+    def close(self):
+        if self.executor: self.executor.shutdown(cancel_futures=True)
+
+BENCH_CONFIGS = [(9, 9, 10), (10, 10, 15), (16, 16, 40), (16, 30, 99)]
+
+def benchmark(configs=BENCH_CONFIGS, boards=10):
+    for rows, cols, mines in configs:
+        rng = np.random.default_rng(0)
+        start = start_cell(rows, cols)
+        tries, found = 0, 0
+        t0 = time.perf_counter()
+        while found < boards:
+            tries += 1
+            found += no_guess(safe_start(rows, cols, mines, rng), start)
+        elapsed = time.perf_counter() - t0
+        print(f"{rows}x{cols}, {mines} mines: {found/tries:.1%} of layouts need no guess, "
+              f"{elapsed/found*1000:.0f} ms per board")
+
+if __name__ == "__main__":
+    benchmark(boards=int(sys.argv[1]) if len(sys.argv) > 1 else 10)
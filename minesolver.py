@@ -0,0 +1,318 @@
+import sys, time, math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import minefield
+
+# Minesweeper solver that only looks at what a player can see: which cells
+# are open, their neighbour counts, and the total number of mines. The open
+# frontier is split into independent components (hidden cells linked by a
+# shared number). Small components are solved exactly by backtracking over
+# bitmasks, bigger ones get an approximate iterative estimate, and the global
+# mine count weights everything together.
+
+ENUM_LIMIT = 60  # largest component we try to enumerate exactly
+NODE_LIMIT = 200_000  # search nodes before a component falls back to the estimate
+
+class _TooBig(Exception):
+    pass
+
+class Solution:
+    def __init__(self, shape):
+        self.safe = set()
+        self.mines = set()
+        self.probability = {}  # (r, c) -> chance of a mine, frontier cells
+        self.interior = 0.0  # chance for a hidden cell with no open neighbour
+        self.shape = shape
+        self.exact = True
+
+    def grid(self):
+        """Mine probability for every cell as an array, 0 where revealed."""
+        out = np.full(self.shape, self.interior)
+        for (r, c), p in self.probability.items():
+            out[r, c] = p
+        return out
+
+    def best_guess(self, hidden):
+        """Least likely mine among hidden cells: (r, c)."""
+        grid = np.where(hidden, self.grid(), 2.0)
+        return tuple(int(v) for v in np.unravel_index(grid.argmin(), grid.shape))
+
+def _components(constraints):
+    # union-find over hidden cells, joined by every constraint they share
+    parent = {}
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    for cells, _ in constraints:
+        for v in cells: parent.setdefault(v, v)
+        root = find(cells[0])
+        for v in cells[1:]:
+            other = find(v)
+            if other != root: parent[other] = root
+    groups = {}
+    for cells, count in constraints:
+        groups.setdefault(find(cells[0]), []).append((cells, count))
+    return list(groups.values())
+
+def _propagate(constraints):
+    """Single-number and subset deductions until nothing changes. Returns
+    (safe, mines, remaining constraints over the still-unknown cells)."""
+    safe, mines = set(), set()
+    cons = [(frozenset(cells), count) for cells, count in constraints]
+    changed = True
+    while changed:
+        changed = False
+        reduced = {}
+        for cells, count in cons:
+            count -= len(cells & mines)
+            cells = cells - mines - safe
+            if not cells: continue
+            if count == 0: safe |= cells; changed = True
+            elif count == len(cells): mines |= cells; changed = True
+            else: reduced[cells] = count
+        cons = list(reduced.items())
+        if changed: continue
+        by_cell = {}
+        for k, (cells, _) in enumerate(cons):
+            for v in cells: by_cell.setdefault(v, []).append(k)
+        for a, (cells_a, count_a) in enumerate(cons):
+            near = {b for v in cells_a for b in by_cell[v]} - {a}
+            for b in near:
+                cells_b, count_b = cons[b]
+                if cells_a < cells_b:
+                    rest, left = cells_b - cells_a, count_b - count_a
+                    if left == 0: safe |= rest; changed = True
+                    elif left == len(rest): mines |= rest; changed = True
+            if changed: break
+    return safe, mines, [(sorted(cells), count) for cells, count in cons]
+
+def _enumerate(cons, node_limit=NODE_LIMIT):
+    """Every mine layout of one component. Returns (cells, totals, per_cell)
+    where totals[m] counts layouts with m mines and per_cell[m][i] counts the
+    ones among those with a mine on cells[i]."""
+    # order cells so each constraint closes as early as possible
+    order = []
+    seen = set()
+    for cells, _ in cons:
+        for v in cells:
+            if v not in seen:
+                seen.add(v)
+                order.append(v)
+    bit = {v: 1 << i for i, v in enumerate(order)}
+    n = len(order)
+    masks = [(sum(bit[v] for v in cells), count) for cells, count in cons]
+    # constraints to recheck after assigning cell i
+    touching = [[] for _ in range(n)]
+    for mask, count in masks:
+        for i in range(n):
+            if mask >> i & 1: touching[i].append((mask, count))
+    totals = {}
+    per_cell = {}
+    nodes = [0]
+    def search(i, assigned, mines):
+        nodes[0] += 1
+        if nodes[0] > node_limit: raise _TooBig
+        if i == n:
+            m = bin(mines).count("1")
+            totals[m] = totals.get(m, 0) + 1
+            counts = per_cell.setdefault(m, [0]*n)
+            j = 0
+            while mines >> j:
+                if mines >> j & 1: counts[j] += 1
+                j += 1
+            return
+        b = 1 << i
+        assigned |= b
+        for value in (0, b):
+            placed = mines | value
+            for mask, count in touching[i]:
+                got = bin(placed & mask).count("1")
+                if got > count or got + bin(mask & ~assigned).count("1") < count: break
+            else:
+                search(i+1, assigned, placed)
+    search(0, 0, 0)
+    return order, totals, per_cell
+
+def _approximate(cons, density, rounds=20):
+    # scale each constraint's cells toward its count and average, repeatedly
+    p = {v: density for cells, _ in cons for v in cells}
+    for _ in range(rounds):
+        acc = {v: [] for v in p}
+        for cells, count in cons:
+            total = sum(p[v] for v in cells)
+            scale = count/total if total else 0.0
+            for v in cells: acc[v].append(min(1.0, p[v]*scale) if total else count/len(cells))
+        p = {v: sum(a)/len(a) for v, a in acc.items()}
+    return p
+
+def _log_comb(n, k):
+    if k < 0 or k > n: return -math.inf
+    return math.lgamma(n+1) - math.lgamma(k+1) - math.lgamma(n-k+1)
+
+def solve(revealed, counts, num_mines, limit=ENUM_LIMIT, trusted=None, density=None):
+    """revealed: bool array, counts: neighbour counts (read only where
+    revealed), num_mines: total on the board. trusted: optional bool array,
+    numbers outside it are not used as constraints. For part of a bigger
+    board pass num_mines=None and the chance of a mine per hidden cell as
+    density instead."""
+    rows, cols = revealed.shape
+    sol = Solution(revealed.shape)
+    hidden = ~revealed
+    pad = np.zeros((rows+2, cols+2), dtype=bool)
+    pad[1:-1, 1:-1] = hidden
+    near_hidden = np.zeros_like(revealed)
+    for dr, dc in minefield.NEIGHBORS:
+        near_hidden |= pad[1+dr:rows+1+dr, 1+dc:cols+1+dc]
+    constraints = []
+    numbers = revealed & near_hidden
+    if trusted is not None: numbers &= trusted
+    for r, c in np.argwhere(numbers).tolist():
+        cells = [(r+dr, c+dc) for dr, dc in minefield.NEIGHBORS
+                 if 0 <= r+dr < rows and 0 <= c+dc < cols and hidden[r+dr, c+dc]]
+        constraints.append((cells, int(counts[r, c])))
+    frontier = {v for cells, _ in constraints for v in cells}
+    interior = int(hidden.sum()) - len(frontier)
+    sol.safe, sol.mines, constraints = _propagate(constraints)
+    for v in sol.safe: sol.probability[v] = 0.0
+    for v in sol.mines: sol.probability[v] = 1.0
+
+    results, approx = [], []
+    for comp in _components(constraints):
+        size = len({v for cells, _ in comp for v in cells})
+        try:
+            if size > limit: raise _TooBig
+            results.append(_enumerate(comp))
+        except _TooBig:
+            approx.append(comp)
+    # approximate components: take their expected mine count off the top
+    if num_mines is not None:
+        density = num_mines/max(1, int(hidden.sum()))
+    expected_approx = 0.0
+    for comp in approx:
+        sol.exact = False
+        for v, p in _approximate(comp, density).items():
+            sol.probability[v] = p
+            expected_approx += p
+    if num_mines is None:
+        # no known total: every cell is a mine with chance density on its
+        # own, so a frontier total k only weighs in through its odds
+        density = min(max(density, 1e-6), 1 - 1e-6)
+        odds = math.log(density/(1 - density))
+        def weight(k):
+            return k*odds
+    else:
+        budget = num_mines - len(sol.mines) - expected_approx
+        # weight of a frontier total k: ways to place the rest in the interior
+        def weight(k):
+            return _log_comb(interior, round(budget - k))
+    # mine-count distribution of every exact component convolved together
+    def convolve(parts):
+        dist = {0: 1.0}
+        for _, totals, _ in parts:
+            nxt = {}
+            for a, x in dist.items():
+                for m, y in totals.items():
+                    nxt[a+m] = nxt.get(a+m, 0.0) + x*y
+            dist = nxt
+        return dist
+    full = convolve(results)
+    logs = {k: weight(k) for k in full}
+    top = max((l for l in logs.values() if l > -math.inf), default=0.0)
+    z = sum(x*math.exp(logs[k]-top) for k, x in full.items() if logs[k] > -math.inf)
+    if z == 0:  # inconsistent with the mine count, drop that constraint
+        logs = {k: 0.0 for k in full}
+        top = 0.0
+        z = sum(full.values())
+    if num_mines is None:
+        sol.interior = density if interior else 0.0
+    else:
+        interior_mines = sum(x*math.exp(logs[k]-top)*(budget-k) for k, x in full.items() if logs[k] > -math.inf)/z
+        sol.interior = min(1.0, max(0.0, interior_mines/interior)) if interior else 0.0
+    for i, (cells, totals, per_cell) in enumerate(results):
+        rest = convolve(results[:i] + results[i+1:])
+        acc = [0.0]*len(cells)
+        for m, counts_m in per_cell.items():
+            w = sum(x*math.exp(weight(m+k)-top) for k, x in rest.items() if weight(m+k) > -math.inf)
+            if not w: continue
+            for j, n in enumerate(counts_m): acc[j] += n*w
+        for j, v in enumerate(cells):
+            p = acc[j]/z
+            sol.probability[v] = p
+            if p <= 1e-12: sol.safe.add(v)
+            elif p >= 1-1e-12: sol.mines.add(v)
+    return sol
+
+def solve_region(field, row, col, rows, cols):
+    """Solve only a window of a (possibly huge or endless) field plus a
+    one-cell margin. Numbers on the margin see cells outside the window so
+    they are left out. Unless the window holds every hidden cell its mine
+    total is unknown, so each hidden cell gets the board's mine density
+    instead of a guessed total, which would make wrong cells look certain.
+    Returns (solution, top_row, left_col) of the solved area."""
+    r0, c0, r1, c1 = row-1, col-1, row+rows+1, col+cols+1
+    if field.rows is not None:
+        r0, c0 = max(0, r0), max(0, c0)
+        r1, c1 = min(field.rows, r1), min(field.cols, c1)
+    _, revealed, _, counts = field.window(r0, c0, r1-r0, c1-c0)
+    trusted = np.ones(revealed.shape, dtype=bool)
+    if r0 != 0 or field.rows is None: trusted[0, :] = False
+    if c0 != 0 or field.rows is None: trusted[:, 0] = False
+    if r1 != field.rows: trusted[-1, :] = False
+    if c1 != field.cols: trusted[:, -1] = False
+    hidden = int((~revealed).sum())
+    if field.rows is None:
+        return solve(revealed, counts, None, trusted=trusted, density=field.density), r0, c0
+    left = field.num_mines + field.safe_left
+    if hidden < left:
+        return solve(revealed, counts, None, trusted=trusted, density=field.num_mines/left), r0, c0
+    return solve(revealed, counts, field.num_mines, trusted=trusted), r0, c0
+
+def autoplay(field, first=None):
+    """Play a Minefield to the end with the solver. Returns (won, moves)."""
+    if first is None: first = (field.rows//2, field.cols//2)
+    field.reveal(*first)
+    moves = 1
+    while not field.lost and not field.won:
+        sol = solve(field.revealed, field.counts, field.num_mines)
+        safe = [v for v in sol.safe if not field.revealed[v]]
+        if not safe:
+            safe = [sol.best_guess(~field.revealed)]
+        for r, c in safe:
+            field.reveal(r, c)
+            moves += 1
+            if field.lost: break
+    return field.won, moves
+
+def _play_batch(rows, cols, mines, games, seed):
+    rng = np.random.default_rng(seed)
+    wins, elapsed = 0, 0.0
+    for _ in range(games):
+        # first click is always safe, reroll boards that put a mine on it
+        while True:
+            field = minefield.Minefield(rows, cols, mines, seed=int(rng.integers(1 << 32)))
+            if not field.mine[rows//2, cols//2]: break
+        start = time.perf_counter()
+        won, _ = autoplay(field)
+        elapsed += time.perf_counter() - start
+        wins += won
+    return wins, elapsed
+
+BENCH_CONFIGS = [(9, 9, 10), (16, 16, 40), (16, 30, 99), (10, 10, 15)]
+
+def benchmark(configs=BENCH_CONFIGS, games=200, workers=None, chunk=10):
+    with ProcessPoolExecutor(workers) as pool:
+        for rows, cols, mines in configs:
+            jobs = [pool.submit(_play_batch, rows, cols, mines, chunk, seed) for seed in range(games//chunk)]
+            wins = elapsed = 0
+            for job in jobs:
+                w, t = job.result()
+                wins += w
+                elapsed += t
+            played = chunk*len(jobs)
+            print(f"{rows}x{cols}, {mines} mines ({mines/(rows*cols):.0%}): win rate {wins/played:.1%}, "
+                  f"{elapsed/played*1000:.1f} ms per game")
+
+if __name__ == "__main__":
+    benchmark(games=int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -1,6 +1,6 @@
-import pygame, random, sys, os
-
-pygame.init()
+import pygame, sys, os
+import numpy as np
+import minefield, minesolver, minegen, chunkfield, textcache
 
 # Game constants
 WIDTH, HEIGHT = 600, 700
@@ -18,136 +18,220 @@ REVEALED_COLOR = (220, 220, 220)
 FLAG_COLOR = (255, 0, 0)
 TEXT_COLOR = (0, 0, 0)
 
-# Fonts
-FONT = pygame.font.SysFont("arial", 24, bold=True)
-FONT_BIG = pygame.font.SysFont("arial", 48, bold=True)
+# Screen, fonts and sprites, made by open_window() from main(): BoardPool's
+# workers re-import this file when processes are spawned (Windows, macOS)
+# and must not open windows of their own
+WIN = CLOCK = FONT = FONT_BIG = MINE_IMAGE = None
+TILE_SURFACES = GAME_OVER_LAYER = WIN_LAYER = None
+HINT_SAFE = HINT_MINE = HINT_ODDS = None
 
-# Screen
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Minesweeper")
-CLOCK = pygame.time.Clock()
+# Marathon mode: 1000x1000 at expert density (99 mines per 480 cells),
+# viewed through a window that scrolls with the arrow keys
+MARATHON = (1000, 1000, 206250)
+SAVE_FILE = "minesweeper_save.bin"
+# Endless mode: no edges at all, the field is streamed in chunks (chunkfield.py)
+ENDLESS = (None, None, None)
 
-# Load mine sprite
-MINE_IMAGE = pygame.image.load(os.path.join("mine.png"))
-MINE_IMAGE = pygame.transform.scale(MINE_IMAGE, (TILE_SIZE-10, TILE_SIZE-10))
+def configure(rows, cols, num_mines):
+    global ROWS, COLS, NUM_MINES, VIEW_ROWS, VIEW_COLS, GRID_WIDTH, GRID_HEIGHT, X_OFFSET, Y_OFFSET
+    ROWS, COLS, NUM_MINES = rows, cols, num_mines
+    VIEW_ROWS = (HEIGHT - TOP_OFFSET)//TILE_SIZE
+    VIEW_COLS = WIDTH//TILE_SIZE
+    if ROWS is not None:
+        VIEW_ROWS, VIEW_COLS = min(ROWS, VIEW_ROWS), min(COLS, VIEW_COLS)
+    # Calculate offsets to center grid
+    GRID_WIDTH = VIEW_COLS * TILE_SIZE
+    GRID_HEIGHT = VIEW_ROWS * TILE_SIZE
+    X_OFFSET = (WIDTH - GRID_WIDTH) // 2
+    Y_OFFSET = TOP_OFFSET + (HEIGHT - TOP_OFFSET - GRID_HEIGHT) // 2
 
-# Calculate offsets to center grid
-GRID_WIDTH = COLS * TILE_SIZE
-GRID_HEIGHT = ROWS * TILE_SIZE
-X_OFFSET = (WIDTH - GRID_WIDTH) // 2
-Y_OFFSET = TOP_OFFSET + (HEIGHT - TOP_OFFSET - GRID_HEIGHT) // 2
+configure(ROWS, COLS, NUM_MINES)
 
 
-class Tile:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.rect = pygame.Rect(X_OFFSET + col*TILE_SIZE, Y_OFFSET + row*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-        self.is_mine = False
-        self.revealed = False
-        self.flagged = False
-        self.neighbors = 0
+def make_tile(revealed, flagged, is_mine, neighbors):
+    surf = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    rect = surf.get_rect()
+    color = REVEALED_COLOR if revealed else HIDDEN_COLOR
+    pygame.draw.rect(surf, color, rect)
+    pygame.draw.rect(surf, GRID_COLOR, rect, 2)
+    if revealed:
+        if is_mine:
+            surf.blit(MINE_IMAGE, (5, 5))
+        elif neighbors > 0:
+            text = FONT.render(str(neighbors), True, TEXT_COLOR)
+            surf.blit(text, ((TILE_SIZE - text.get_width())//2, (TILE_SIZE - text.get_height())//2))
+    elif flagged:
+        pygame.draw.circle(surf, FLAG_COLOR, rect.center, TILE_SIZE//4)
+    return surf.convert()
 
-    def draw(self):
-        color = REVEALED_COLOR if self.revealed else HIDDEN_COLOR
-        pygame.draw.rect(WIN, color, self.rect)
-        pygame.draw.rect(WIN, GRID_COLOR, self.rect, 2)
-        if self.revealed:
-            if self.is_mine:
-                WIN.blit(MINE_IMAGE, (self.rect.x+5, self.rect.y+5))
-            elif self.neighbors > 0:
-                text = FONT.render(str(self.neighbors), True, TEXT_COLOR)
-                WIN.blit(text, (self.rect.x + (TILE_SIZE - text.get_width())//2,
-                                self.rect.y + (TILE_SIZE - text.get_height())//2))
-        elif self.flagged:
-            pygame.draw.circle(WIN, FLAG_COLOR, self.rect.center, TILE_SIZE//4)
+# Every tile looks like one of these: hidden, flagged, a mine, or revealed
+# with 0-8 neighbours. Game.draw only blits cells whose state code changed.
+HIDDEN, FLAGGED, MINE, REVEALED = 0, 1, 2, 3  # REVEALED+n for n neighbours
+
+def make_overlay(message, color):
+    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0,0,0,150))
+    text = FONT_BIG.render(message, True, color)
+    overlay.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2))
+    return overlay.convert_alpha()
+
+def make_hint(color, alpha):
+    surf = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+    pygame.draw.rect(surf, color + (alpha,), surf.get_rect().inflate(-6, -6), border_radius=4)
+    return surf.convert_alpha()
+
+def open_window():
+    global WIN, CLOCK, FONT, FONT_BIG, MINE_IMAGE, TILE_SURFACES, GAME_OVER_LAYER, WIN_LAYER
+    global HINT_SAFE, HINT_MINE, HINT_ODDS
+    pygame.init()
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Minesweeper")
+    CLOCK = pygame.time.Clock()
+    FONT = textcache.get_font("arial", 24, bold=True)
+    FONT_BIG = textcache.get_font("arial", 48, bold=True)
+    # Load mine sprite
+    MINE_IMAGE = pygame.image.load(os.path.join("mine.png"))
+    MINE_IMAGE = pygame.transform.scale(MINE_IMAGE, (TILE_SIZE-10, TILE_SIZE-10))
+    TILE_SURFACES = ([make_tile(False, False, False, 0), make_tile(False, True, False, 0),
+                      make_tile(True, False, True, 0)]
+                     + [make_tile(True, False, False, n) for n in range(9)])
+    GAME_OVER_LAYER = make_overlay("Game Over", (255,255,255))
+    WIN_LAYER = make_overlay("You Win!", (0,255,0))
+    # Hint overlay for hidden cells: green when surely safe, red when surely a
+    # mine, otherwise orange getting stronger with the mine probability (tenths)
+    HINT_SAFE = make_hint((0,200,0), 150)
+    HINT_MINE = make_hint((220,0,0), 170)
+    HINT_ODDS = [make_hint((255,140,0), 20 + 14*i) for i in range(11)]
 
 
 class Game:
-    def __init__(self):
-        self.grid = [[Tile(r, c) for c in range(COLS)] for r in range(ROWS)]
+    def __init__(self, pool=None, wait=0.0, field=None):
+        # boards come ready-made from the pool when there is one; either way
+        # the start cell is mine-free and opened for the player. A loaded
+        # field is taken as it is.
+        self.no_guess = False
+        start = None
+        if field is not None:
+            self.field = field
+        elif ROWS is None:
+            self.field = chunkfield.ChunkField()
+            start = self.field.start
+        else:
+            if pool is not None:
+                mines, start, self.no_guess = pool.get(ROWS, COLS, NUM_MINES, wait)
+            else:
+                mines, start = minegen.safe_start(ROWS, COLS, NUM_MINES), minegen.start_cell(ROWS, COLS)
+            # mine/revealed/flagged/neighbour layers live in numpy arrays
+            self.field = minefield.Minefield(ROWS, COLS, NUM_MINES, mines=mines)
         self.mines = NUM_MINES
-        self.game_over = False
-        self.win = False
-        self.place_mines()
-        self.calculate_neighbors()
-
-    def place_mines(self):
-        positions = random.sample([(r,c) for r in range(ROWS) for c in range(COLS)], NUM_MINES)
-        for r,c in positions:
-            self.grid[r][c].is_mine = True
-
-    def calculate_neighbors(self):
-        for r in range(ROWS):
-            for c in range(COLS):
-                if self.grid[r][c].is_mine:
-                    continue
-                count = 0
-                for dr in [-1,0,1]:
-                    for dc in [-1,0,1]:
-                        nr,nc = r+dr,c+dc
-                        if 0<=nr<ROWS and 0<=nc<COLS and self.grid[nr][nc].is_mine:
-                            count +=1
-                self.grid[r][c].neighbors = count
+        self.game_over = self.field.lost
+        self.win = self.field.won
+        self.hint = None  # (probability grid, top row, left col) while H is shown
+        self.background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.background.fill(BG_COLOR)
+        # Top info
+        if self.mines is None: status = "Endless - arrow keys to explore"
+        else: status = f"Mines: {self.mines}" + ("   No guessing needed" if self.no_guess else "")
+        text = textcache.render(FONT, status, TEXT_COLOR)
+        self.background.blit(text, (10,30))
+        self.redraw_all()
+        self.view_row = 0  # top-left cell of the visible window
+        self.view_col = 0
+        if start is not None:
+            self.scroll(start[0] - VIEW_ROWS//2, start[1] - VIEW_COLS//2)
+            self.reveal(*start)
+
+    def redraw_all(self):
+        # state code last drawn at each on-screen cell, -1 forces a blit
+        self.drawn = np.full((VIEW_ROWS, VIEW_COLS), -1, dtype=np.int16)
+        self.full_redraw = True
+        self.overlay_drawn = False
+
+    def show_hint(self):
+        # the solver only sees what the player sees: open cells and their numbers
+        sol, r0, c0 = minesolver.solve_region(self.field, self.view_row, self.view_col, VIEW_ROWS, VIEW_COLS)
+        self.hint = (sol.grid(), r0, c0)
+        self.drawn[:] = -1
+
+    def clear_hint(self):
+        if self.hint is not None:
+            self.hint = None
+            self.drawn[:] = -1
+
+    def hint_surface(self, row, col):
+        grid, r0, c0 = self.hint
+        p = grid[row - r0, col - c0]
+        if p <= 1e-9: return HINT_SAFE
+        if p >= 1 - 1e-9: return HINT_MINE
+        return HINT_ODDS[round(p*10)]
 
     def reveal(self, row, col):
-        tile = self.grid[row][col]
-        if tile.revealed or tile.flagged:
-            return
-        tile.revealed = True
-        if tile.is_mine:
+        self.clear_hint()
+        self.field.reveal(row, col)
+        if self.field.lost:
             self.game_over = True
-            return
-        if tile.neighbors == 0:
-            for dr in [-1,0,1]:
-                for dc in [-1,0,1]:
-                    nr,nc = row+dr,col+dc
-                    if 0<=nr<ROWS and 0<=nc<COLS:
-                        if not self.grid[nr][nc].revealed:
-                            self.reveal(nr,nc)
 
     def toggle_flag(self, row, col):
-        tile = self.grid[row][col]
-        if tile.revealed:
-            return
-        tile.flagged = not tile.flagged
+        self.clear_hint()
+        self.field.toggle_flag(row, col)
 
     def check_win(self):
-        for r in range(ROWS):
-            for c in range(COLS):
-                tile = self.grid[r][c]
-                if not tile.is_mine and not tile.revealed:
-                    return False
-        self.win = True
-        return True
+        # the field keeps a running count of unopened safe cells
+        if self.field.won:
+            self.win = True
+        return self.win
+
+    def scroll(self, drow, dcol):
+        self.clear_hint()
+        self.view_row += drow
+        self.view_col += dcol
+        if ROWS is not None:
+            self.view_row = max(0, min(self.view_row, ROWS - VIEW_ROWS))
+            self.view_col = max(0, min(self.view_col, COLS - VIEW_COLS))
+
+    def cell_at(self, mx, my):
+        row = (my - Y_OFFSET)//TILE_SIZE
+        col = (mx - X_OFFSET)//TILE_SIZE
+        if 0<=row<VIEW_ROWS and 0<=col<VIEW_COLS:
+            return self.view_row + row, self.view_col + col
+        return None
+
+    def view_codes(self):
+        mine, revealed, flagged, counts = self.field.window(self.view_row, self.view_col, VIEW_ROWS, VIEW_COLS)
+        return np.where(revealed,
+                        np.where(mine, MINE, REVEALED + counts.astype(np.int16)),
+                        np.where(flagged, FLAGGED, HIDDEN))
+
+    def close(self):
+        if ROWS is None: self.field.close()
 
     def draw(self):
-        WIN.fill(BG_COLOR)
-        # Top info
-        status = f"Mines: {self.mines}"
-        text = FONT.render(status, True, TEXT_COLOR)
-        WIN.blit(text, (10,30))
-        # Draw grid
-        for row in self.grid:
-            for tile in row:
-                tile.draw()
-        if self.game_over:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0,0,0,150))
-            WIN.blit(overlay,(0,0))
-            text = FONT_BIG.render("Game Over", True, (255,255,255))
-            WIN.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2))
-        if self.win:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0,0,0,150))
-            WIN.blit(overlay,(0,0))
-            text = FONT_BIG.render("You Win!", True, (0,255,0))
-            WIN.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2))
-        pygame.display.update()
+        rects = []
+        if self.full_redraw:
+            WIN.blit(self.background, (0,0))
+            rects.append(WIN.get_rect())
+            self.full_redraw = False
+        # Only cells whose state changed since the last frame get blitted
+        codes = self.view_codes()
+        for r, c in np.argwhere(codes != self.drawn).tolist():
+            rect = WIN.blit(TILE_SURFACES[codes[r, c]], (X_OFFSET + c*TILE_SIZE, Y_OFFSET + r*TILE_SIZE))
+            if self.hint is not None and codes[r, c] in (HIDDEN, FLAGGED):
+                WIN.blit(self.hint_surface(self.view_row + r, self.view_col + c), rect)
+            rects.append(rect)
+        self.drawn = codes
+        if (self.game_over or self.win) and not self.overlay_drawn:
+            WIN.blit(GAME_OVER_LAYER if self.game_over else WIN_LAYER, (0,0))
+            rects = [WIN.get_rect()]
+            self.overlay_drawn = True
+        if rects:
+            pygame.display.update(rects)
 
 
 def main():
-    game = Game()
+    open_window()
+    # boards are generated off the main loop, so a new game starts at once
+    pool = minegen.BoardPool()
+    game = Game(pool, wait=2.0)
     running = True
     while running:
         CLOCK.tick(FPS)
@@ -155,21 +239,48 @@ def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running=False
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                game.redraw_all()
             if game.game_over or game.win:
                 if event.type == pygame.KEYDOWN:
-                    game = Game()
+                    game.close()
+                    game = Game(pool)
                 continue
+            if event.type == pygame.KEYDOWN:
+                step = 10 if event.mod & pygame.KMOD_SHIFT else 1
+                if event.key == pygame.K_UP: game.scroll(-step, 0)
+                elif event.key == pygame.K_DOWN: game.scroll(step, 0)
+                elif event.key == pygame.K_LEFT: game.scroll(0, -step)
+                elif event.key == pygame.K_RIGHT: game.scroll(0, step)
+                elif event.key == pygame.K_s and ROWS is not None:
+                    game.field.save(SAVE_FILE)
+                elif event.key == pygame.K_l and ROWS is not None:
+                    try: field = minefield.Minefield.load(SAVE_FILE)
+                    except (OSError, ValueError): continue
+                    if (field.rows, field.cols, field.num_mines) != (ROWS, COLS, NUM_MINES):
+                        configure(field.rows, field.cols, field.num_mines)
+                    game = Game(field=field)
+                elif event.key == pygame.K_h:
+                    if game.hint is None: game.show_hint()
+                    else: game.clear_hint()
             if event.type == pygame.MOUSEBUTTONDOWN:
                 mx,my = pygame.mouse.get_pos()
-                row = (my - Y_OFFSET)//TILE_SIZE
-                col = (mx - X_OFFSET)//TILE_SIZE
-                if 0<=row<ROWS and 0<=col<COLS:
+                cell = game.cell_at(mx, my)
+                if cell:
+                    row, col = cell
                     if event.button == 1:
                         game.reveal(row,col)
                         game.check_win()
                     elif event.button == 3:
                         game.toggle_flag(row,col)
+    game.close()
+    pool.close()
     pygame.quit()
     sys.exit()
 
-main()
+if __name__ == "__main__":
+    if "marathon" in sys.argv[1:]:
+        configure(*MARATHON)
+    elif "endless" in sys.argv[1:]:
+        configure(*ENDLESS)
+    main()
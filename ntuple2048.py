@@ -0,0 +1,160 @@
+import os, sys, time, random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import bitboard2048 as bb
+
+# Learned 2048 evaluator: an n-tuple network, i.e. one weight table per board
+# pattern, indexed by the tile exponents the pattern covers and summed over
+# the 8 symmetries of the board. Trained by TD(0) on afterstates through
+# self-play on bitboard2048, so it plays by the same rules as Game.move.
+
+PATTERNS = (
+    (0, 1, 2, 3),    # outer row
+    (4, 5, 6, 7),    # inner row
+    (0, 1, 4, 5),    # corner square
+    (1, 2, 5, 6),    # edge square
+    (5, 6, 9, 10),   # centre square
+)
+TABLE_SIZE = 16**len(PATTERNS[0])  # every pattern covers the same number of cells
+WEIGHTS_FILE = "ntuple2048.npy"
+ALPHA = 0.1/(8*len(PATTERNS))  # step size spread over every feature
+
+_MOVES = (bb.move_left, bb.move_right, bb.move_up, bb.move_down)
+_SHIFTS = [[(4*cell, 4*k) for k, cell in enumerate(p)] for p in PATTERNS]
+
+def flip_rows(board):
+    # mirror left/right: reverse the nibbles inside every row
+    return (((board & 0x000F000F000F000F) << 12) | ((board & 0x00F000F000F000F0) << 4)
+            | ((board & 0x0F000F000F000F00) >> 4) | ((board & 0xF000F000F000F000) >> 12))
+
+def flip_cols(board):
+    # mirror top/bottom: reverse the order of the rows
+    return (((board & 0xFFFF) << 48) | (((board >> 16) & 0xFFFF) << 32)
+            | (((board >> 32) & 0xFFFF) << 16) | (board >> 48))
+
+def symmetries(board):
+    t = bb.transpose(board)
+    out = []
+    for b in (board, t):
+        v = flip_cols(b)
+        out += (b, flip_rows(b), v, flip_rows(v))
+    return out
+
+def features(board):
+    """(table, index) for every pattern on every symmetry of the board."""
+    out = []
+    for b in symmetries(board):
+        for t, shifts in enumerate(_SHIFTS):
+            index = 0
+            for src, dst in shifts:
+                index |= ((b >> src) & 0xF) << dst
+            out.append((t, index))
+    return out
+
+class Network:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def value(self, board):
+        tables = self.tables
+        return sum(tables[t][i] for t, i in features(board))
+
+    def learn(self, board, delta, changes=None):
+        tables = self.tables
+        for t, i in features(board):
+            tables[t][i] += delta
+            if changes is not None:
+                changes[t][i] = changes[t].get(i, 0.0) + delta
+
+    def best_move(self, board):
+        """(direction, afterstate, reward) maximising reward + V(afterstate)."""
+        best = None
+        for name, f in zip(bb.DIRECTIONS, _MOVES):
+            after, reward = f(board)
+            if after == board: continue
+            v = reward + self.value(after)
+            if best is None or v > best[0]:
+                best = (v, name, after, reward)
+        return best[1:] if best else (None, board, 0)
+
+def play_and_learn(net, rng, alpha=ALPHA, changes=None):
+    board, _ = bb.spawn_tile(0, rng)
+    board, _ = bb.spawn_tile(board, rng)
+    score = 0
+    prev = None
+    while True:
+        direction, after, reward = net.best_move(board)
+        if direction is None: break
+        if prev is not None:
+            net.learn(prev, alpha*(reward + net.value(after) - net.value(prev)), changes)
+        prev = after
+        score += reward
+        board, _ = bb.spawn_tile(after, rng)
+    if prev is not None:
+        net.learn(prev, -alpha*net.value(prev), changes)
+    return score, bb.max_tile(board)
+
+def create_weights(path=WEIGHTS_FILE):
+    weights = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(len(PATTERNS), TABLE_SIZE))
+    weights.flush()
+    return weights
+
+def open_weights(path=WEIGHTS_FILE, mode="r"):
+    weights = np.load(path, mmap_mode=mode)
+    if weights.shape != (len(PATTERNS), TABLE_SIZE):
+        raise ValueError(f"{path} was trained with different patterns")
+    return weights
+
+def _selfplay(path, games, alpha, seed):
+    # worker: learn on a private copy, hand back only the summed changes
+    net = Network([w.tolist() for w in open_weights(path)])
+    rng = random.Random(seed)
+    changes = [{} for _ in PATTERNS]
+    results = [play_and_learn(net, rng, alpha, changes) for _ in range(games)]
+    deltas = [(np.fromiter(c.keys(), np.int64, len(c)), np.fromiter(c.values(), np.float32, len(c))) for c in changes]
+    return deltas, results
+
+def train(rounds=10, games=50, workers=None, path=WEIGHTS_FILE, alpha=ALPHA, seed=None):
+    """Run `rounds` of self-play, `games` per worker per round, merging every
+    worker's weight changes into the memory-mapped checkpoint after each round."""
+    if workers is None: workers = os.cpu_count() or 1
+    weights = open_weights(path, "r+") if os.path.exists(path) else create_weights(path)
+    seeds = random.Random(seed)
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    played = 0
+    start = time.perf_counter()
+    try:
+        for r in range(rounds):
+            jobs = [(path, games, alpha, seeds.getrandbits(32)) for _ in range(max(1, workers))]
+            outputs = pool.map(_selfplay, *zip(*jobs)) if pool else [_selfplay(*job) for job in jobs]
+            results = []
+            for deltas, res in outputs:
+                for t, (index, delta) in enumerate(deltas):
+                    np.add.at(weights[t], index, delta)
+                results += res
+            weights.flush()
+            played += len(results)
+            elapsed = time.perf_counter() - start
+            scores = [s for s, _ in results]
+            reached = sum(top >= 2048 for _, top in results)/len(results)
+            print(f"round {r+1}: mean score {sum(scores)/len(scores):.0f}, 2048 rate {reached:.0%}, "
+                  f"{played*3600/elapsed:,.0f} games/hour")
+    finally:
+        if pool: pool.shutdown()
+
+class Player:
+    """Plays from a trained checkpoint, weights stay memory-mapped."""
+    def __init__(self, path=WEIGHTS_FILE):
+        self.net = Network(open_weights(path))
+
+    def best_move(self, board):
+        return self.net.best_move(board)[0]
+
+    def autoplay(self, game):
+        """Make one move on a 2048.py Game through Game.move."""
+        direction = self.best_move(game.board)
+        if direction is not None: game.move(direction)
+        return direction
+
+if __name__ == "__main__":
+    train(rounds=int(sys.argv[1]) if len(sys.argv) > 1 else 10)
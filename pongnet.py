@@ -0,0 +1,275 @@
+import sys, time, socket, struct, heapq, random, zlib
+from multiprocessing import Process, Queue
+from pongsim import WIDTH, Rng, Paddle, Ball
+
+# Rollback netcode for two-player Pong over UDP. A NetGame is driven only
+# by each frame's pair of inputs and its own seeded Rng, so both peers
+# compute identical frames from identical inputs. Each peer runs its own
+# input at once and guesses the other's (the last one it received; players
+# mostly hold keys). It keeps snapshots of the last MAX_ROLLBACK frames, and
+# when a real remote input turns out to differ from the guess it reloads
+# that frame and simulates forward again. A peer only waits when the other
+# falls more than MAX_ROLLBACK frames behind.
+
+FRAME_RATE = 60
+MAX_ROLLBACK = 10  # frames of snapshots, about 170 ms of delay hidden
+SEND_WINDOW = 64  # most frames of input one packet repeats
+UP, DOWN = 1, 2  # input bits
+NET_PORT = 7707
+
+MAGIC = b"PONG"
+HELLO, SEED, INPUTS = 0, 1, 2
+_HEADER = struct.Struct("<4sBIii")  # magic, kind, seed, ack, first frame; then one byte per frame
+
+class NetGame:
+    """Two-player Pong with nothing but inputs and an Rng deciding it. A
+    match ends at WIN_SCORE; the scores then start over and the winner's
+    tally goes up."""
+    WIN_SCORE = 7
+    def __init__(self, seed):
+        self.rng = Rng(seed)
+        self.paddles = Paddle(20), Paddle(WIDTH - 30)
+        self.ball = Ball(self.rng)
+        self.score = [0, 0]
+        self.wins = [0, 0]
+        self.frame = 0
+
+    def step(self, inputs):
+        for paddle, bits in zip(self.paddles, inputs):
+            if bits & UP: paddle.move(up=True)
+            if bits & DOWN: paddle.move(up=False)
+        ball = self.ball
+        ball.update(*self.paddles)
+        if ball.rect.right < 0 or ball.rect.left > WIDTH:
+            side = ball.rect.right < 0  # the right player scores off the left edge
+            self.score[side] += 1
+            if self.score[side] >= self.WIN_SCORE:
+                self.wins[side] += 1
+                self.score = [0, 0]
+            ball.reset()
+        self.frame += 1
+
+    def save(self):
+        return (self.frame, self.rng.state, tuple(self.score), tuple(self.wins),
+                self.paddles[0].state(), self.paddles[1].state(), self.ball.state())
+
+    def load(self, state):
+        self.frame, self.rng.state, score, wins, left, right, ball = state
+        self.score, self.wins = list(score), list(wins)
+        self.paddles[0].restore(left)
+        self.paddles[1].restore(right)
+        self.ball.restore(ball)
+
+    def checksum(self):
+        return zlib.crc32(repr(self.save()).encode())  # float reprs are exact
+
+class Session:
+    """One peer's view of a NetGame: its own side's inputs, the other
+    side's as they arrive, and enough snapshots to redo what was guessed."""
+    def __init__(self, side, seed, max_rollback=MAX_ROLLBACK):
+        self.game = NetGame(seed)
+        self.side = side  # 0 left, 1 right
+        self.max_rollback = max_rollback
+        self.local, self.remote = {}, {}  # frame -> input bits
+        self.guessed = {}  # frame -> remote bits it was last simulated with
+        self.snapshots = {}  # frame -> state before that frame
+        self.confirmed = -1  # every remote input up to here has arrived
+        self.rollback_to = None  # earliest frame simulated with a wrong guess
+        self.rollbacks = self.resimulated = self.stalls = 0
+
+    def remote_input(self, frame, bits):
+        if frame in self.remote or frame <= self.confirmed: return
+        self.remote[frame] = bits
+        while self.confirmed + 1 in self.remote: self.confirmed += 1
+        if frame < self.game.frame and self.guessed.get(frame) != bits:
+            if self.rollback_to is None or frame < self.rollback_to: self.rollback_to = frame
+
+    def guess(self, frame):
+        bits = self.remote.get(frame)
+        return self.remote.get(self.confirmed, 0) if bits is None else bits
+
+    def simulate(self, frame):
+        self.snapshots[frame] = self.game.save()
+        self.guessed[frame] = remote = self.guess(frame)
+        inputs = (self.local[frame], remote) if self.side == 0 else (remote, self.local[frame])
+        self.game.step(inputs)
+
+    def rollback(self):
+        """Redo every frame since the first wrong guess."""
+        start, end = self.rollback_to, self.game.frame
+        if start is None: return
+        self.rollback_to = None
+        self.game.load(self.snapshots[start])
+        for frame in range(start, end): self.simulate(frame)
+        self.rollbacks += 1
+        self.resimulated += end - start
+
+    def advance(self, bits):
+        """Run the next frame with the local input. Returns False, without
+        running it, while the other peer is too far behind to guess for."""
+        self.rollback()
+        frame = self.game.frame
+        if frame - self.confirmed > self.max_rollback:
+            self.stalls += 1
+            return False
+        self.local[frame] = bits
+        self.simulate(frame)
+        old = frame - self.max_rollback - 1
+        self.snapshots.pop(old, None)
+        self.guessed.pop(old, None)
+        self.remote.pop(min(old, self.confirmed - 1), None)
+        return True
+
+def open_socket(port=0):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("", port))
+    sock.setblocking(False)
+    return sock
+
+class Link:
+    """The UDP connection to the other peer. Each packet repeats every local
+    input the peer hasn't acknowledged yet, so a lost packet costs nothing
+    once a later one arrives. latency (seconds, plus up to jitter) and loss
+    (a probability) are injected on the sending side for testing."""
+    def __init__(self, sock, address, seed, latency=0.0, jitter=0.0, loss=0.0, rng=None):
+        self.sock, self.address, self.seed = sock, address, seed
+        self.latency, self.jitter, self.loss = latency, jitter, loss
+        self.rng = rng or random.Random()
+        self.acked = -1  # last local frame the peer has
+        self.outbox = []  # (due time, order, packet) held back by the injected latency
+        self.sent = 0
+
+    def _send(self, packet):
+        if self.loss and self.rng.random() < self.loss: return
+        if self.latency or self.jitter:
+            due = time.perf_counter() + self.latency + self.rng.random()*self.jitter
+            heapq.heappush(self.outbox, (due, self.sent, packet))
+        else:
+            self.sock.sendto(packet, self.address)
+        self.sent += 1
+
+    def flush(self):
+        now = time.perf_counter()
+        while self.outbox and self.outbox[0][0] <= now:
+            self.sock.sendto(heapq.heappop(self.outbox)[2], self.address)
+
+    def send(self, session):
+        first = max(self.acked + 1, session.game.frame - SEND_WINDOW)
+        frames = bytes(session.local[f] for f in range(first, session.game.frame))
+        self._send(_HEADER.pack(MAGIC, INPUTS, self.seed, session.confirmed, first) + frames)
+        self.flush()
+
+    def receive(self, session):
+        while True:
+            try: packet, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError): break
+            if len(packet) < _HEADER.size: continue
+            magic, kind, seed, ack, first = _HEADER.unpack_from(packet)
+            if magic != MAGIC or address != self.address: continue
+            if kind == HELLO:  # our SEED got lost, the joiner is still asking
+                self.sock.sendto(_HEADER.pack(MAGIC, SEED, self.seed, -1, 0), address)
+            elif kind == INPUTS:
+                self.acked = max(self.acked, ack)
+                for i, bits in enumerate(packet[_HEADER.size:]):
+                    session.remote_input(first + i, bits)
+        # drop what the peer has, but keep the frames it may still ask for
+        for frame in [f for f in session.local if f <= self.acked - SEND_WINDOW]:
+            del session.local[frame]
+
+def connect(sock, address=None, timeout=30.0):
+    """Handshake. The host (no address) waits for a joiner and picks the
+    seed; the joiner says hello until it hears the seed. Returns (side,
+    seed, peer address): the host plays left."""
+    deadline = time.monotonic() + timeout
+    seed = random.getrandbits(32) if address is None else None
+    while time.monotonic() < deadline:
+        if address is not None:
+            sock.sendto(_HEADER.pack(MAGIC, HELLO, 0, -1, 0), address)
+        try: packet, sender = sock.recvfrom(2048)
+        except (BlockingIOError, ConnectionResetError):
+            time.sleep(0.05)
+            continue
+        if len(packet) < _HEADER.size: continue
+        magic, kind, packet_seed, _, _ = _HEADER.unpack_from(packet)
+        if magic != MAGIC: continue
+        if address is None and kind == HELLO:
+            sock.sendto(_HEADER.pack(MAGIC, SEED, seed, -1, 0), sender)
+            return 0, seed, sender
+        if address is not None and kind == SEED:
+            return 1, packet_seed, sender
+    raise TimeoutError("no other player turned up")
+
+def _peer(host, port, frames, latency, jitter, loss, results):
+    # one side of a loopback test: a bot that holds keys for a while,
+    # paced at FRAME_RATE, then a wait until both sides have every input
+    sock = open_socket(port if host else 0)
+    side, seed, address = connect(sock, None if host else ("127.0.0.1", port))
+    session = Session(side, seed)
+    link = Link(sock, address, seed, latency, jitter, loss, random.Random(side))
+    bot = random.Random(side + 10)
+    bits, worst, slow = 0, 0.0, 0
+    start = time.perf_counter()
+    while session.game.frame < frames:
+        due = start + (session.game.frame + session.stalls)/FRAME_RATE
+        time.sleep(max(0.0, due - time.perf_counter()))
+        t = time.perf_counter()
+        if bot.random() < 0.08: bits = bot.choice((0, UP, DOWN))
+        link.receive(session)
+        session.advance(bits)
+        link.send(session)
+        work = time.perf_counter() - t
+        worst = max(worst, work)
+        slow += work > 1/FRAME_RATE
+    elapsed = time.perf_counter() - start
+    deadline, done = time.perf_counter() + 10, None
+    while time.perf_counter() < deadline:
+        link.receive(session)
+        link.send(session)
+        if session.confirmed >= frames - 1 and link.acked >= frames - 1:
+            done = done or time.perf_counter()
+            if time.perf_counter() - done > 0.3: break  # let our last acks through
+        time.sleep(1/FRAME_RATE)
+    session.rollback()
+    results.put((side, session.game.checksum(), session.rollbacks, session.resimulated,
+                 session.stalls, slow, worst, elapsed))
+
+def loopback(frames=1200, latency=0.05, jitter=0.01, loss=0.1, port=NET_PORT):
+    """Play two bot peers in separate processes over 127.0.0.1 and check
+    they end on the same state."""
+    results = Queue()
+    peers = [Process(target=_peer, args=(host, port, frames, latency, jitter, loss, results))
+             for host in (True, False)]
+    for p in peers: p.start()
+    out = sorted(results.get(timeout=120) for _ in peers)
+    for p in peers: p.join()
+    return out
+
+def capacity(seconds=1.0):
+    """Frames a NetGame can resimulate per second, snapshots included."""
+    session = Session(0, 1)
+    frames, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        # every remote input arrives as late as it can and never matches
+        # the guess, so each frame rolls back as far as the window allows
+        late = session.game.frame - (MAX_ROLLBACK - 1)
+        if late >= 0: session.remote_input(late, UP if late % 2 else DOWN)
+        session.advance(UP)
+        frames += 1
+    return session.resimulated/(time.perf_counter() - start), session.resimulated/frames
+
+def benchmark(frames=1200):
+    rate, depth = capacity()
+    print(f"resimulation: {rate:,.0f} frames/sec, {rate/FRAME_RATE:,.0f} per 60 FPS frame "
+          f"(stress test rolled back {depth:.1f} frames every frame)")
+    for latency, jitter, loss in ((0.0, 0.0, 0.0), (0.03, 0.01, 0.05), (0.06, 0.02, 0.1), (0.1, 0.03, 0.2)):
+        out = loopback(frames, latency, jitter, loss)
+        synced = len({r[1] for r in out}) == 1
+        desc = f"{latency*1000:.0f}+{jitter*1000:.0f} ms, {loss:.0%} loss:"
+        print(f"{desc:<22} {'in sync' if synced else 'DESYNC'}", end="")
+        for side, _, rollbacks, resim, stalls, slow, worst, elapsed in out:
+            print(f" | {'LR'[side]}: {rollbacks/elapsed:.1f} rollbacks/s, {resim/elapsed:.0f} frames/s "
+                  f"resimulated, {stalls} stalls, {slow} slow frames (worst {worst*1000:.1f} ms)", end="")
+        print()
+
+if __name__ == "__main__":
+    benchmark(frames=int(sys.argv[1]) if len(sys.argv) > 1 else 1200)
@@ -0,0 +1,326 @@
+import sys, time, math, random
+import pygame
+
+# Headless Pong physics. Speeds are in pixels per tick of 1/60 s, the rate
+# the game first ran at, and every update takes the length of its step in
+# ticks, so the same rules run at 60, 120 or 240 Hz or as fast as possible.
+# The ball's box is swept along its path each step and stopped at the first
+# wall or paddle face it touches, so nothing is missed between steps.
+
+WIDTH, HEIGHT = 800, 500
+WHITE = (255, 255, 255)
+TICK_RATE = 60  # ticks per second that speeds are measured in
+MAX_CONTACTS = 4  # walls and paddles one step may bounce off
+MASK = (1 << 64) - 1
+
+class Rng:
+    """xorshift64: a seeded generator whose whole state is one int, so it
+    can be snapshotted and sent over the network along with a game."""
+    def __init__(self, seed=0):
+        self.state = (seed ^ 0x9E3779B97F4A7C15) & MASK or 1
+    def random(self):
+        x = self.state
+        x ^= (x << 13) & MASK
+        x ^= x >> 7
+        x ^= (x << 17) & MASK
+        self.state = x
+        return (x >> 11) / (1 << 53)
+    def uniform(self, a, b):
+        return a + (b - a)*self.random()
+    def randint(self, a, b):
+        return a + int(self.random()*(b - a + 1))
+    def choice(self, seq):
+        return seq[int(self.random()*len(seq))]
+
+class Paddle:
+    WIDTH, HEIGHT = 10, 80
+    SPEED = 6
+    def __init__(self, x):
+        self.rect = pygame.Rect(x, HEIGHT//2 - self.HEIGHT//2, self.WIDTH, self.HEIGHT)
+        self.reset()
+    def reset(self):
+        self.y = self.prev_y = float(HEIGHT//2 - self.HEIGHT//2)
+        self.rect.y = int(self.y)
+    def move(self, up=True, h=1.0):
+        self.y += (-self.SPEED if up else self.SPEED)*h
+        self.y = max(0, min(self.y, HEIGHT - self.HEIGHT))
+        self.rect.y = round(self.y)
+    def state(self):
+        return self.y
+    def restore(self, y):
+        self.y = self.prev_y = y
+        self.rect.y = round(y)
+    def draw(self, surface, alpha=1.0):
+        y = self.prev_y + (self.y - self.prev_y)*alpha
+        pygame.draw.rect(surface, WHITE, (self.rect.x, round(y), self.WIDTH, self.HEIGHT))
+
+class Ball:
+    SIZE = 12
+    SPIN_FRICTION = 0.993
+    MAX_SPIN = 0.45
+    BASE_SPEED_INC = 1.0003
+    MAX_DX, MAX_DY = 14, 12
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.flight = 0  # bumped whenever the path changes other than at walls
+        self.reset()
+    def reset(self):
+        self.flight += 1
+        self.x = WIDTH / 2.0
+        self.y = HEIGHT / 2.0
+        self.prev = (self.x, self.y)  # don't draw a streak back to the edge
+        angle = self.rng.uniform(-0.35, 0.35)
+        horiz = self.rng.choice([-1, 1])
+        speed = 5.5
+        self.dx = horiz * speed * math.cos(angle)
+        self.dy = speed * math.sin(angle)
+        self.spin = 0.0
+        self.update_rect()
+    def update_rect(self):
+        self.rect = pygame.Rect(int(self.x - self.SIZE/2), int(self.y - self.SIZE/2), self.SIZE, self.SIZE)
+    def state(self):
+        return self.x, self.y, self.dx, self.dy, self.spin, self.flight
+    def restore(self, state):
+        self.x, self.y, self.dx, self.dy, self.spin, self.flight = state
+        self.prev = (self.x, self.y)
+        self.update_rect()
+    def update(self, paddle_left, paddle_right, h=1.0):
+        """Advance h ticks."""
+        self.prev = (self.x, self.y)
+        self.dy += self.spin*h
+        self.dx *= self.BASE_SPEED_INC**h
+        self.dx = max(min(self.dx, self.MAX_DX), -self.MAX_DX)
+        self.dy = max(min(self.dy, self.MAX_DY), -self.MAX_DY)
+        left = h
+        for _ in range(MAX_CONTACTS):
+            t, hit = self.contact(left, paddle_left, paddle_right)
+            self.x += self.dx*t
+            self.y += self.dy*t
+            left -= t
+            if hit is None: break
+            if hit is paddle_left:
+                self.x = paddle_left.rect.right + self.SIZE/2
+                self.paddle_bounce(paddle_left)
+            elif hit is paddle_right:
+                self.x = paddle_right.rect.left - self.SIZE/2
+                self.paddle_bounce(paddle_right)
+            else:
+                self.dy *= -1
+                self.spin *= -0.6
+        self.spin *= self.SPIN_FRICTION**h
+        self.update_rect()
+    def contact(self, left, paddle_left, paddle_right):
+        """(time, wall or paddle) of the first thing the ball's box touches
+        in the next `left` ticks, or (left, None)."""
+        r = self.SIZE/2
+        x, y, dx, dy = self.x, self.y, self.dx, self.dy
+        best, hit = left, None
+        if dy < 0 and y + dy*left <= r:
+            best, hit = max(0.0, (r - y)/dy), "top"
+        elif dy > 0 and y + dy*left >= HEIGHT - r:
+            best, hit = max(0.0, (HEIGHT - r - y)/dy), "bottom"
+        # a paddle face is hit if the ball's centre crosses it, widened by r,
+        # while the ball overlaps the paddle vertically; a ball already level
+        # with the paddle, because the paddle moved onto it, bounces at once
+        if dx < 0:
+            p = paddle_left.rect
+            face = p.right + r
+            if x > p.left - r and x + dx*left <= face:
+                t = max(0.0, (face - x)/dx)
+                if t <= best and p.top - r < y + dy*t < p.bottom + r: best, hit = t, paddle_left
+        elif dx > 0:
+            p = paddle_right.rect
+            face = p.left - r
+            if x < p.right + r and x + dx*left >= face:
+                t = max(0.0, (face - x)/dx)
+                if t <= best and p.top - r < y + dy*t < p.bottom + r: best, hit = t, paddle_right
+        return best, hit
+    def paddle_bounce(self, paddle):
+        self.flight += 1
+        self.dx *= -1
+        offset = (self.y - (paddle.rect.centery)) / (paddle.HEIGHT / 2)
+        offset = max(min(offset, 1.0), -1.0)
+        self.dy = offset * 6.5
+        self.spin += max(min(offset * 0.28, self.MAX_SPIN), -self.MAX_SPIN)
+        self.dx += self.rng.uniform(-0.35, 0.35)
+        self.dx = max(min(self.dx, self.MAX_DX), -self.MAX_DX)
+        self.dy = max(min(self.dy, self.MAX_DY), -self.MAX_DY)
+    def draw(self, surface, alpha=1.0):
+        x = self.prev[0] + (self.x - self.prev[0])*alpha
+        y = self.prev[1] + (self.y - self.prev[1])*alpha
+        pygame.draw.rect(surface, WHITE, (int(x - self.SIZE/2), int(y - self.SIZE/2), self.SIZE, self.SIZE))
+
+# Between bounces Ball.update has a closed form: dx grows by BASE_SPEED_INC
+# a tick until its clamp, dy gains a spin that decays by SPIN_FRICTION, so
+# it moves monotonically toward its clamp and y is convex or concave. The
+# predictor jumps from wall bounce to wall bounce with it, binary searching
+# each monotone stretch of y for the first step that touches a wall,
+# instead of stepping every frame. A wall bounce inside a step mirrors the
+# rest of that step's motion, so the state after it is the mirror image.
+MAX_FRAMES = 2000  # ticks the predictor follows a ball for
+TOP = Ball.SIZE/2
+BOTTOM = HEIGHT - Ball.SIZE/2
+
+class Flight:
+    """Ball.update in steps of h ticks from one state with no walls or
+    paddles in the way."""
+    def __init__(self, x, y, dx, dy, spin, h=1.0):
+        self.x0, self.y0, self.dx0, self.dy0, self.spin = x, y, dx, dy, spin
+        self.h = h
+        self.R, self.F = Ball.BASE_SPEED_INC**h, Ball.SPIN_FRICTION**h
+        self.s = spin*h  # dy gained on the first step
+        self.limit = int(MAX_FRAMES/h)
+        self.sx = 1 if dx > 0 else -1
+        self.sy = 1 if spin > 0 else -1
+        # steps before dx, then dy, reach their clamps
+        if abs(dx) >= Ball.MAX_DX: self.kx = 1
+        else:
+            k = max(1, math.ceil(math.log(Ball.MAX_DX/abs(dx))/math.log(self.R)))
+            while k > 1 and abs(dx)*self.R**(k-1) >= Ball.MAX_DX: k -= 1
+            while abs(dx)*self.R**k < Ball.MAX_DX: k += 1
+            self.kx = k
+        self.kc = self.first(self.sy*Ball.MAX_DY)
+        self.k0 = self.first(0)  # where dy turns toward the spin
+
+    def u(self, k):
+        # dy after k steps ignoring its clamp
+        return self.dy0 + self.s*(1 - self.F**k)/(1 - self.F)
+
+    def first(self, limit):
+        """First step k >= 1 where dy passes `limit` in the spin's direction."""
+        s, sy = self.s, self.sy
+        if s == 0: return 1 if sy*(self.dy0 - limit) > 0 else math.inf
+        q = 1 - (limit - self.dy0)*(1 - self.F)/s
+        if q > 1: return 1
+        if q <= 0: return math.inf
+        k = max(1, math.floor(math.log(q)/math.log(self.F)) + 1)
+        if k > self.limit: return math.inf  # no flight lasts that long
+        while k > 1 and sy*(self.u(k-1) - limit) > 0: k -= 1
+        while sy*(self.u(k) - limit) <= 0:
+            k += 1
+            if k > self.limit: return math.inf
+        return k
+
+    def x(self, n):
+        m = min(n, self.kx - 1)
+        R = self.R
+        return self.x0 + self.h*(self.dx0*R*(R**m - 1)/(R - 1) + (n - m)*self.sx*Ball.MAX_DX)
+
+    def y(self, n):
+        m = min(n, self.kc - 1)
+        F = self.F
+        a = self.s/(1 - F)
+        return self.y0 + self.h*(m*self.dy0 + a*(m - F*(1 - F**m)/(1 - F)) + (n - m)*self.sy*Ball.MAX_DY)
+
+    def off(self, n):
+        y = self.y(n)
+        return y <= TOP or y >= BOTTOM
+
+    def wall(self, n):
+        """First step in 1..n that touches a wall, or None."""
+        if n < 1: return None
+        if self.off(1): return 1
+        turn = min(max(self.k0 - 1, 1), n)  # y is monotone either side of it
+        for a, b in ((1, turn), (turn, n)):
+            if b > a and self.off(b):
+                while b - a > 1:
+                    mid = (a + b)//2
+                    if self.off(mid): b = mid
+                    else: a = mid
+                return b
+        return None
+
+    def reach(self, target_x):
+        """First step n >= 0 with x at or past target_x, None past the limit."""
+        past = lambda n: self.sx*(self.x(n) - target_x) >= 0
+        if past(0): return 0
+        m = self.kx - 1
+        if m > 0 and past(m):  # still speeding up: x is geometric in n
+            q = 1 + (target_x - self.x0)*(self.R - 1)/(self.h*self.dx0*self.R)
+            n = min(max(1, math.ceil(math.log(q)/math.log(self.R))), m)
+        else:  # at full speed: linear
+            n = m + max(1, math.ceil(self.sx*(target_x - self.x(m))/(self.h*Ball.MAX_DX)))
+        # float rounding can leave the estimate a step off
+        while n > 1 and past(n - 1): n -= 1
+        while not past(n): n += 1
+        return n if n <= self.limit else None
+
+    def bounce(self, n):
+        """State after step n, which touches a wall."""
+        dx = self.dx0*self.R**n if n < self.kx else self.sx*Ball.MAX_DX
+        dy = max(min(self.u(n), Ball.MAX_DY), -Ball.MAX_DY)
+        spin = self.spin*self.F**(n-1)
+        y = self.y(n)
+        y = 2*TOP - y if y <= TOP else 2*BOTTOM - y
+        return self.x(n), y, dx, -dy, spin*-0.6*self.F
+
+def predict_ball_destination(ball, target_x, h=1.0):
+    """y where the ball first reaches target_x, following Ball.update's
+    spin, friction, clamps and wall bounces but not the paddles."""
+    state = (ball.x, ball.y, ball.dx, ball.dy, ball.spin)
+    if ball.dx == 0: return HEIGHT / 2.0
+    for _ in range(MAX_FRAMES):
+        flight = Flight(*state, h)
+        n = flight.reach(target_x)
+        if n is None: break
+        if n == 0: return state[1]  # already there, maybe off a bounce
+        hit = flight.wall(n)
+        if hit is None: return flight.y(n)
+        state = flight.bounce(hit)
+    return HEIGHT / 2.0
+
+class BallPredictor:
+    """Caches predictions for the current flight. A ball's path only changes
+    on a paddle hit or a reset, and both bump Ball.flight."""
+    def __init__(self, h=1.0):
+        self.h = h
+        self.flight = None
+        self.cache = {}
+    def predict(self, ball, target_x):
+        if ball.flight != self.flight:
+            self.flight = ball.flight
+            self.cache.clear()
+        if target_x not in self.cache:
+            self.cache[target_x] = predict_ball_destination(ball, target_x, self.h)
+        return self.cache[target_x]
+
+def _fly(h, seed):
+    # a ball from a random state stepped until it passes x=30 or 770, with
+    # the paddles parked out of the way
+    rng = random.Random(seed)
+    ball = Ball()
+    ball.x, ball.y = rng.uniform(100, 700), rng.uniform(TOP, BOTTOM)
+    ball.dx = rng.choice([-1, 1])*rng.uniform(4, 14)
+    ball.dy, ball.spin = rng.uniform(-12, 12), rng.uniform(-0.6, 0.6)
+    target = 770 if ball.dx > 0 else 30
+    predicted = predict_ball_destination(ball, target, h)
+    away = Paddle(-5000)
+    for _ in range(int(MAX_FRAMES/h)):
+        ball.update(away, away, h)
+        if (ball.x - target)*ball.dx >= 0: break
+    return predicted, ball.y
+
+def benchmark(rates=(60, 120, 240), seconds=1.0, flights=500):
+    for rate in rates:
+        h = TICK_RATE/rate
+        err = max(abs(p - y) for p, y in (_fly(h, seed) for seed in range(flights)))
+        # an uncapped rally: both paddles chase the ball
+        left, right, ball = Paddle(20), Paddle(WIDTH - 30), Ball()
+        steps, misses, start = 0, 0, time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for _ in range(1000):
+                for p in (left, right):
+                    if p.rect.centery < ball.y - 10: p.move(False, h)
+                    elif p.rect.centery > ball.y + 10: p.move(True, h)
+                ball.update(left, right, h)
+                if not 0 < ball.x < WIDTH:
+                    misses += 1
+                    ball.reset()
+            steps += 1000
+        elapsed = time.perf_counter() - start
+        print(f"{rate} Hz: {steps/elapsed:,.0f} steps/sec uncapped "
+              f"({steps/elapsed/rate:,.0f}x real time), {misses} points, "
+              f"predictor off by at most {err:.1e} px")
+
+if __name__ == "__main__":
+    benchmark(seconds=float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
@@ -0,0 +1,141 @@
+import sys, time, random
+from collections import deque
+import snakegrid
+from snakegrid import OBSTACLE
+
+# Snake autopilot. It plans a shortest path to the food over the wrapping
+# grid and only takes it if the snake could still reach its own tail after
+# eating. Otherwise it walks a precomputed Hamiltonian cycle, or failing that
+# chases its tail. A plan is kept and followed until the food moves or the
+# next cell is blocked, so most ticks cost one lookup.
+#
+# Paths are timed: body segment i (head = 0) of a snake of length L leaves
+# its cell after L-i ticks, so a path may cross cells the body still covers
+# now as long as they are gone by the time the head gets there.
+
+CYCLE_STEPS = 30  # cycle cells to follow before trying the food again
+
+def hamiltonian_cycle(cols, rows):
+    """nxt[cell] along a cycle through every cell: a serpentine whose last
+    row wraps back to the first. None when cols and rows are both odd."""
+    if cols % 2 and rows % 2: return None
+    flip = rows % 2 == 1  # serpentine down the columns instead
+    w, h = (rows, cols) if flip else (cols, rows)
+    order = []
+    for y in range(h):
+        for x in (range(w) if y % 2 == 0 else range(w-1, -1, -1)):
+            order.append(x*cols + y if flip else y*cols + x)
+    nxt = [0]*(cols*rows)
+    for a, b in zip(order, order[1:] + order[:1]):
+        nxt[a] = b
+    return nxt
+
+class Autopilot:
+    def __init__(self, grid):
+        self.grid = grid
+        self.adj = [[(name, grid.neighbour(c, name)) for name in snakegrid.DIRECTIONS] for c in range(grid.size)]
+        self.cycle = hamiltonian_cycle(grid.cols, grid.rows)
+        self.plan = deque()
+        self.food = None  # food position the plan was made for
+        self.head = None  # where the head should be when the plan continues
+        self.replans = 0
+
+    def _bfs(self, body, start, goal):
+        """Shortest timed path start -> goal, start excluded, or None."""
+        cells = self.grid.cells
+        n = len(body)
+        free_at = {c: n - i for i, c in enumerate(body)}
+        parent = {start: None}
+        frontier = [start]
+        d = 0
+        while frontier:
+            d += 1
+            nxt = []
+            for c in frontier:
+                for _, nb in self.adj[c]:
+                    if nb in parent or cells[nb] == OBSTACLE or free_at.get(nb, 0) >= d: continue
+                    parent[nb] = c
+                    if nb == goal:
+                        path = [nb]
+                        while parent[path[-1]] != start: path.append(parent[path[-1]])
+                        return path[::-1]
+                    nxt.append(nb)
+            frontier = nxt
+        return None
+
+    def _safe_after(self, body, path, grow):
+        # can the snake that has just walked `path` still reach its tail?
+        n = len(body) + grow
+        virtual = (path[::-1] + list(body))[:n]
+        return n <= 1 or self._bfs(virtual, virtual[0], virtual[-1]) is not None
+
+    def _cycle_segment(self, body, food):
+        n = len(body)
+        free_at = {c: n - i for i, c in enumerate(body)}
+        cells = self.grid.cells
+        path, c = [], body[0]
+        for d in range(1, CYCLE_STEPS+1):
+            c = self.cycle[c]
+            if cells[c] == OBSTACLE or free_at.get(c, 0) >= d: break
+            path.append(c)
+            if c == food: break
+        return path
+
+    def replan(self, game):
+        self.replans += 1
+        body, head, food = game.snake, game.snake[0], game.food
+        path = self._bfs(body, head, food)
+        if path and self._safe_after(body, path, True): return path
+        if self.cycle:
+            path = self._cycle_segment(body, food)
+            if path and self._safe_after(body, path, path[-1] == food): return path
+        path = self._bfs(body, head, body[-1]) if len(body) > 1 else None
+        if path: return path
+        # boxed in: any cell that is free right now
+        cells = self.grid.cells
+        return [nb for _, nb in self.adj[head] if cells[nb] in (snakegrid.EMPTY, snakegrid.FOOD)][:1]
+
+    def decide(self, game):
+        """Direction for the next tick of a snakegrid.Game."""
+        head = game.snake[0]
+        cells = self.grid.cells
+        if (not self.plan or game.food != self.food or head != self.head
+                or cells[self.plan[0]] not in (snakegrid.EMPTY, snakegrid.FOOD)):
+            self.plan = deque(self.replan(game))
+            self.food = game.food
+        if not self.plan:
+            return game.direction
+        step = self.plan.popleft()
+        self.head = step
+        for name, nb in self.adj[head]:
+            if nb == step: return name
+        return game.direction
+
+def play(seed, cols=30, rows=30, obstacles=20, max_ticks=20000):
+    game = snakegrid.Game(cols, rows, obstacles, random.Random(seed))
+    pilot = Autopilot(game.grid)
+    ticks, elapsed, worst = 0, 0.0, 0.0
+    while not game.over and ticks < max_ticks:
+        start = time.perf_counter()
+        game.turn(pilot.decide(game))
+        t = time.perf_counter() - start
+        elapsed += t
+        worst = max(worst, t)
+        game.step()
+        ticks += 1
+    return game.score, ticks, elapsed, worst, pilot.replans
+
+def benchmark(games=20, cols=30, rows=30):
+    scores, ticks, elapsed, worst, replans = [], 0, 0.0, 0.0, 0
+    for seed in range(games):
+        s, t, e, w, r = play(seed, cols, rows)
+        scores.append(s)
+        ticks += t
+        elapsed += e
+        worst = max(worst, w)
+        replans += r
+    print(f"{cols}x{rows}, {games} games: average score {sum(scores)/games:.1f} (best {max(scores)}), "
+          f"{elapsed/ticks*1e6:.0f} us per decision, worst {worst*1000:.1f} ms, replanned on {replans/ticks:.0%} of ticks")
+
+if __name__ == "__main__":
+    benchmark(games=int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,149 @@
+import time, random
+from collections import deque
+import snakegrid
+from snakegrid import BODY, OBSTACLE, FOOD
+
+# Many snakes on one wrapping snakegrid.Grid. Every tick all snakes pick a
+# direction, then collisions are settled at once against the board as it was
+# before anyone moved: two or more heads on one cell all die, a head on any
+# body (tails included, as in snakegrid.Game) or an obstacle dies. Heads go
+# in a dict, so a tick is linear in the number of snakes. Dead snakes free
+# their cells and bots respawn on a random free cell.
+
+DIRECTIONS = tuple(snakegrid.DIRECTIONS)  # direction i means DIRECTIONS[i]
+OPPOSITE = [DIRECTIONS.index(snakegrid.OPPOSITE[d]) for d in DIRECTIONS]
+
+class ArenaSnake:
+    __slots__ = ("body", "direction", "target", "alive", "score", "bot")
+
+    def __init__(self, bot):
+        self.body = deque()
+        self.direction = 0
+        self.target = 0  # index into Arena.food this bot is heading for
+        self.alive = False
+        self.score = 0
+        self.bot = bot
+
+class Arena:
+    def __init__(self, cols, rows, bots, food=None, obstacles=0, player=False, rng=None):
+        self.grid = grid = snakegrid.Grid(cols, rows)
+        self.rng = rng or random.Random()
+        self.adj = [tuple(grid.neighbour(c, d) for d in DIRECTIONS) for c in range(grid.size)]
+        self.owner = [-1]*grid.size  # snake index on every body cell
+        self.changed = []  # cells whose contents changed, for the renderer
+        self.obstacles = snakegrid.generate_obstacles(grid, obstacles, self.rng)
+        self.food = [grid.place(FOOD, self.rng) for _ in range(food if food is not None else bots//2 + 1)]
+        self.food_at = {c: i for i, c in enumerate(self.food) if c is not None}
+        self.missing = [i for i, c in enumerate(self.food) if c is None]  # food slots waiting for room
+        self.player = 0 if player else None  # the player is snake 0
+        self.snakes = [ArenaSnake(bot=not (player and i == 0)) for i in range(bots + player)]
+        self.deaths = 0
+        for i in range(len(self.snakes)): self.spawn(i)
+
+    def spawn(self, i):
+        cell = self.grid.place(BODY, self.rng)
+        if cell is None: return False
+        s = self.snakes[i]
+        s.body = deque([cell])
+        s.direction = self.rng.randrange(4)
+        s.target = self.rng.randrange(len(self.food))
+        s.alive = True
+        s.score = 0
+        self.owner[cell] = i
+        self.changed.append(cell)
+        return True
+
+    def steer(self, s, heads):
+        # greedy and O(1): food next to the head first, else the free cell
+        # closest to this bot's target food, never a cell already claimed
+        grid, cells = self.grid, self.grid.cells
+        head = s.body[0]
+        food = self.food[s.target]
+        tx, ty = grid.xy(head if food is None else food)  # no food to head for: wander
+        best, best_score = s.direction, None
+        for d, c in enumerate(self.adj[head]):
+            kind = cells[c]
+            if d == OPPOSITE[s.direction] or kind == BODY or kind == OBSTACLE or c in heads: continue
+            if kind == FOOD: return d
+            x, y = grid.xy(c)
+            dx, dy = abs(x - tx), abs(y - ty)
+            score = -min(dx, grid.cols - dx) - min(dy, grid.rows - dy) + self.rng.random()
+            if best_score is None or score > best_score:
+                best, best_score = d, score
+        return best
+
+    def turn(self, i, direction):
+        if direction != OPPOSITE[self.snakes[i].direction]:
+            self.snakes[i].direction = direction
+
+    def tick(self):
+        grid, cells, owner, changed = self.grid, self.grid.cells, self.owner, self.changed
+        heads = {}  # new head cell -> snake index, -1 when contested
+        moves = []
+        for i, s in enumerate(self.snakes):
+            if not s.alive: continue
+            if s.bot: s.direction = self.steer(s, heads)
+            c = self.adj[s.body[0]][s.direction]
+            heads[c] = -1 if c in heads else i
+            moves.append((i, c))
+        dead, grown, moved = [], [], []
+        for i, c in moves:
+            if heads[c] != i or cells[c] == BODY or cells[c] == OBSTACLE: dead.append(i)
+            elif cells[c] == FOOD: grown.append((i, c))
+            else: moved.append((i, c))
+        # the board only changes once every outcome is known
+        for i, c in grown + moved:
+            grid.occupy(c, BODY)
+            owner[c] = i
+            self.snakes[i].body.appendleft(c)
+            changed.append(c)
+        for i, _ in moved:
+            tail = self.snakes[i].body.pop()
+            grid.release(tail)
+            owner[tail] = -1
+            changed.append(tail)
+        for i in dead:
+            s = self.snakes[i]
+            for c in s.body:
+                grid.release(c)
+                owner[c] = -1
+            changed.extend(s.body)
+            s.body.clear()
+            s.alive = False
+            self.deaths += 1
+        for i, c in grown:
+            self.snakes[i].score += 1
+            f = self.food_at.pop(c)
+            self.food[f] = None
+            self.missing.append(f)
+            self.snakes[i].target = self.rng.randrange(len(self.food))
+        # a full board leaves food slots empty until a later tick frees a cell
+        while self.missing:
+            new = grid.place(FOOD, self.rng)
+            if new is None: break
+            f = self.missing.pop()
+            self.food[f] = new
+            self.food_at[new] = f
+            changed.append(new)
+        for i in dead:
+            if self.snakes[i].bot: self.spawn(i)
+        return dead
+
+    def take_changes(self):
+        changed, self.changed = self.changed, []
+        return changed
+
+def benchmark(counts=(100, 500, 1000), cols=200, rows=200, ticks=200, seed=0):
+    for n in counts:
+        arena = Arena(cols, rows, n, rng=random.Random(seed))
+        start = time.perf_counter()
+        for _ in range(ticks):
+            arena.tick()
+            arena.take_changes()
+        elapsed = time.perf_counter() - start
+        length = sum(len(s.body) for s in arena.snakes)/n
+        print(f"{n} snakes on {cols}x{rows}: {ticks/elapsed:,.0f} ticks/sec "
+              f"({elapsed/ticks/n*1e6:.1f} us per snake), mean length {length:.1f}, {arena.deaths} deaths")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,164 @@
+import time
+import numpy as np
+import snakegrid
+from snakegrid import EMPTY, BODY, OBSTACLE, FOOD
+
+# Steps N independent Snake games in lockstep, by the rules of snakegrid.Game
+# (and so Snake.main): wrap at the edges, 20 obstacles, grow on food, die on
+# an obstacle or the body, tail included. Each board is a (rows, cols) uint8
+# occupancy grid with snakegrid's cell codes; bodies are ring buffers of flat
+# cell indexes, head at `head`, tail `length-1` slots behind it.
+
+DIRECTIONS = tuple(snakegrid.DIRECTIONS)  # action i means DIRECTIONS[i]
+_OPPOSITE = np.array([DIRECTIONS.index(snakegrid.OPPOSITE[d]) for d in DIRECTIONS])
+_DX = np.array([snakegrid.DIRECTIONS[d][0] for d in DIRECTIONS])
+_DY = np.array([snakegrid.DIRECTIONS[d][1] for d in DIRECTIONS])
+
+class BatchSnake:
+    def __init__(self, n, cols=30, rows=30, obstacles=20, seed=None):
+        self.n, self.cols, self.rows = n, cols, rows
+        self.cells = cols*rows
+        self.num_obstacles = obstacles
+        self.rng = np.random.default_rng(seed)
+        self.grid = np.zeros((n, rows, cols), dtype=np.uint8)
+        self.flat = self.grid.reshape(n, self.cells)
+        self.body = np.zeros((n, self.cells), dtype=np.int32)
+        self.head = np.zeros(n, dtype=np.int64)  # ring slot of the head
+        self.length = np.zeros(n, dtype=np.int64)
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start fresh games, all of them or only where mask is True."""
+        idx = np.arange(self.n) if mask is None else np.nonzero(mask)[0]
+        if not len(idx): return self.grid
+        start = (self.rows//2)*self.cols + self.cols//2
+        self.flat[idx] = EMPTY
+        self.flat[idx, start] = BODY
+        self.body[idx, 0] = start
+        self.head[idx] = 0
+        self.length[idx] = 1
+        self.direction[idx] = DIRECTIONS.index("RIGHT")
+        self.scores[idx] = 0
+        self.done[idx] = False
+        self.food[idx] = self.spawn(idx, FOOD)
+        # obstacles: the lowest random keys among the cells still empty
+        keys = self.rng.random((len(idx), self.cells))
+        keys[self.flat[idx] != EMPTY] = 2.0
+        picks = np.argpartition(keys, self.num_obstacles, 1)[:, :self.num_obstacles]
+        self.flat[idx[:, None], picks] = OBSTACLE
+        return self.grid
+
+    def spawn(self, idx, kind):
+        """Put `kind` on a uniformly random empty cell of each game in idx.
+        Returns the cells, -1 where the board was full."""
+        keys = self.rng.random((len(idx), self.cells))
+        keys[self.flat[idx] != EMPTY] = -1.0
+        cells = keys.argmax(1)
+        full = keys[np.arange(len(idx)), cells] < 0
+        cells[full] = -1
+        self.flat[idx[~full], cells[~full]] = kind
+        return cells
+
+    def step(self, actions):
+        """actions: one index into DIRECTIONS per game, turning back on itself
+        is ignored like snakegrid.Game.turn. Finished games are left alone.
+        Returns (observations, rewards, done): +1 for food, -1 for dying."""
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.n, dtype=np.int64)
+        idx = np.nonzero(~self.done)[0]
+        turn = actions[idx] != _OPPOSITE[self.direction[idx]]
+        self.direction[idx[turn]] = actions[idx[turn]]
+        d = self.direction[idx]
+        y, x = np.divmod(self.body[idx, self.head[idx]], self.cols)
+        new = (y + _DY[d]) % self.rows * self.cols + (x + _DX[d]) % self.cols
+        hit = self.flat[idx, new]
+        dead = (hit == BODY) | (hit == OBSTACLE)
+        self.done[idx[dead]] = True
+        rewards[idx[dead]] = -1
+        alive = ~dead
+        idx, new, ate = idx[alive], new[alive], hit[alive] == FOOD
+        self.flat[idx, new] = BODY
+        self.head[idx] = (self.head[idx] + 1) % self.cells
+        self.body[idx, self.head[idx]] = new
+        # no food: the tail moves up; food: the body grows and food respawns
+        move = idx[~ate]
+        tail = self.body[move, (self.head[move] - self.length[move]) % self.cells]
+        self.flat[move, tail] = EMPTY
+        grow = idx[ate]
+        self.length[grow] += 1
+        self.scores[grow] += 1
+        rewards[grow] = 1
+        if len(grow):
+            self.food[grow] = food = self.spawn(grow, FOOD)
+            self.done[grow[food < 0]] = True
+        return self.grid, rewards, self.done.copy()
+
+    def snake(self, i):
+        """Body of game i, head first, like snakegrid.Game.snake."""
+        slots = (self.head[i] - np.arange(self.length[i])) % self.cells
+        return self.body[i, slots].tolist()
+
+def verify(n=32, steps=1000, seed=0):
+    """Replay the batch's actions through snakegrid.Game one game at a time,
+    copying in the batch's obstacle and food placements, and check body,
+    score, board and game-over flags match every step."""
+    sim = BatchSnake(n, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    games = []
+    for i in range(n):
+        g = snakegrid.Game(sim.cols, sim.rows, 0)
+        g.grid.release(g.food)
+        g.food = int(sim.food[i])
+        g.grid.occupy(g.food, FOOD)
+        g.obstacles = np.flatnonzero(sim.flat[i] == OBSTACLE).tolist()
+        for c in g.obstacles: g.grid.occupy(c, OBSTACLE)
+        games.append(g)
+    for _ in range(steps):
+        actions = np.array([_steer(g, rng) for g in games])
+        _, _, done = sim.step(actions)
+        for i, g in enumerate(games):
+            if g.over: continue
+            score = g.score
+            g.turn(DIRECTIONS[actions[i]])
+            g.step()
+            if g.score != score and g.food is not None:
+                # take the batch's food cell instead of the scalar game's pick
+                g.grid.release(g.food)
+                g.food = int(sim.food[i])
+                g.grid.occupy(g.food, FOOD)
+            if g.over != done[i] or g.score != sim.scores[i]: return False
+            if not g.over and (list(g.snake) != sim.snake(i) or bytes(g.grid.cells) != sim.flat[i].tobytes()):
+                return False
+    return True
+
+def _steer(game, rng):
+    # mostly safe moves, mostly toward the food, so snakes get long
+    if game.over: return 0
+    grid, head = game.grid, game.snake[0]
+    fx, fy = grid.xy(game.food)
+    hx, hy = grid.xy(head)
+    options = [a for a, d in enumerate(DIRECTIONS) if grid.cells[grid.neighbour(head, d)] in (EMPTY, FOOD)]
+    if not options or rng.random() < 0.05: return int(rng.integers(4))
+    toward = [a for a in options if (_DX[a] and _DX[a] == np.sign(fx - hx)) or (_DY[a] and _DY[a] == np.sign(fy - hy))]
+    return int(rng.choice(toward or options))
+
+def benchmark(n=4096, steps=500, seed=0):
+    sim = BatchSnake(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    games = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, done = sim.step(rng.integers(0, 4, n))
+        games += int(done.sum())
+        sim.reset(done)
+    elapsed = time.perf_counter() - start
+    print(f"{n} games x {steps} steps in {elapsed:.2f}s: {n*steps/elapsed:,.0f} steps/sec, "
+          f"{games} games finished")
+
+if __name__ == "__main__":
+    print("matches snakegrid.Game:", verify())
+    benchmark()
@@ -0,0 +1,98 @@
+import random
+from collections import deque
+
+# Headless Snake board. Cells are numbered y*cols + x; the grid wraps at
+# every edge. `cells` is an occupancy bitmap (one byte per cell) and `free`
+# lists every empty cell, with `slot` pointing back into it, so occupying,
+# releasing and drawing a uniformly random empty cell are all O(1).
+
+EMPTY, BODY, OBSTACLE, FOOD = 0, 1, 2, 3
+
+DIRECTIONS = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+
+class Grid:
+    def __init__(self, cols, rows):
+        self.cols, self.rows = cols, rows
+        self.size = cols*rows
+        self.cells = bytearray(self.size)
+        self.free = list(range(self.size))
+        self.slot = list(range(self.size))  # index of each empty cell in free
+
+    def occupy(self, cell, kind):
+        if self.cells[cell] == EMPTY:
+            # swap the last free cell into this one's slot
+            i, last = self.slot[cell], self.free[-1]
+            self.free[i] = last
+            self.slot[last] = i
+            self.free.pop()
+        self.cells[cell] = kind
+
+    def release(self, cell):
+        if self.cells[cell] != EMPTY:
+            self.cells[cell] = EMPTY
+            self.slot[cell] = len(self.free)
+            self.free.append(cell)
+
+    def random_free(self, rng=random):
+        """A uniformly random empty cell, None on a full board."""
+        return self.free[rng.randrange(len(self.free))] if self.free else None
+
+    def place(self, kind, rng=random):
+        cell = self.random_free(rng)
+        if cell is not None: self.occupy(cell, kind)
+        return cell
+
+    def neighbour(self, cell, direction):
+        dx, dy = DIRECTIONS[direction]
+        y, x = divmod(cell, self.cols)
+        return (y+dy) % self.rows * self.cols + (x+dx) % self.cols
+
+    def cell(self, x, y):
+        return y*self.cols + x
+
+    def xy(self, cell):
+        y, x = divmod(cell, self.cols)
+        return x, y
+
+def generate_obstacles(grid, n, rng=random):
+    return [grid.place(OBSTACLE, rng) for _ in range(min(n, len(grid.free)))]
+
+class Game:
+    """One game by the rules of Snake.main: start in the middle heading
+    right, wrap at the edges, die on the body (tail included) or an obstacle."""
+    def __init__(self, cols, rows, obstacles=20, rng=random):
+        self.grid = Grid(cols, rows)
+        self.rng = rng
+        self.snake = deque([self.grid.cell(cols//2, rows//2)])  # head first
+        self.grid.occupy(self.snake[0], BODY)
+        self.direction = "RIGHT"
+        self.food = self.grid.place(FOOD, rng)
+        self.obstacles = generate_obstacles(self.grid, obstacles, rng)
+        self.score = 0
+        self.over = False
+
+    def turn(self, direction):
+        if direction != OPPOSITE[self.direction]:
+            self.direction = direction
+
+    def step(self):
+        """Advance one tick. Returns (new head, freed tail cell or None)."""
+        grid = self.grid
+        head = grid.neighbour(self.snake[0], self.direction)
+        # the tail still counts, it only moves after the head
+        if grid.cells[head] in (BODY, OBSTACLE):
+            self.over = True
+            return head, None
+        ate = head == self.food
+        grid.occupy(head, BODY)
+        self.snake.appendleft(head)
+        if ate:
+            self.score += 1
+            self.food = grid.place(FOOD, self.rng)
+            if self.food is None:  # nowhere left to put it
+                self.over = True
+            return head, None
+        tail = self.snake.pop()
+        grid.release(tail)
+        return head, tail
@@ -0,0 +1,31 @@
+from collections import OrderedDict
+import pygame
+
+# Fonts and rendered text shared by all the games. SysFont searches the
+# system font list on every call and Font.render rasterises the string
+# again, so fonts are made once per (name, size, bold) and the last
+# MAX_TEXTS rendered strings are kept. Cached surfaces are shared: blit
+# them, don't draw on them.
+
+MAX_TEXTS = 256
+
+_fonts = {}
+_texts = OrderedDict()
+
+def get_font(name, size, bold=False):
+    key = (name.lower(), size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+def render(font, text, color, antialias=True):
+    """font.render(text, antialias, color), from the cache when it can."""
+    key = (font, text, tuple(color), antialias)
+    surface = _texts.get(key)
+    if surface is not None:
+        _texts.move_to_end(key)
+        return surface
+    surface = _texts[key] = font.render(text, antialias, color)
+    if len(_texts) > MAX_TEXTS: _texts.popitem(last=False)
+    return surface